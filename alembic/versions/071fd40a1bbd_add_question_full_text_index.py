@@ -0,0 +1,26 @@
+"""add question full text index
+
+Revision ID: 071fd40a1bbd
+Revises: b208193bd96a
+Create Date: 2026-10-18 09:57:44.987648
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '071fd40a1bbd'
+down_revision: Union[str, None] = 'b208193bd96a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE INDEX ix_question_content_fts ON question USING gin (to_tsvector('simple'::regconfig, content))")
+
+
+def downgrade() -> None:
+    op.drop_index('ix_question_content_fts', table_name='question')
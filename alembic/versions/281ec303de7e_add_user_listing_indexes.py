@@ -0,0 +1,32 @@
+"""add user listing indexes
+
+Revision ID: 281ec303de7e
+Revises: 6b815065e64a
+Create Date: 2026-10-18 10:12:10.234561
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '281ec303de7e'
+down_revision: Union[str, None] = '6b815065e64a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_user_created_at_id', 'user', ['created_at', 'id'])
+    op.create_index('ix_user_role_id_created_at_id', 'user', ['role_id', 'created_at', 'id'])
+    op.execute('CREATE INDEX ix_user_name_prefix ON "user" (lower(name) text_pattern_ops)')
+    op.execute('CREATE INDEX ix_user_email_prefix ON "user" (lower(email) text_pattern_ops)')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_user_email_prefix', table_name='user')
+    op.drop_index('ix_user_name_prefix', table_name='user')
+    op.drop_index('ix_user_role_id_created_at_id', table_name='user')
+    op.drop_index('ix_user_created_at_id', table_name='user')
@@ -0,0 +1,32 @@
+"""add instance scores
+
+Revision ID: 2bc6c3625372
+Revises: d0abc2d2951b
+Create Date: 2026-10-18 09:36:05.617280
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2bc6c3625372'
+down_revision: Union[str, None] = 'd0abc2d2951b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('tryoutinstance', sa.Column('score', sa.Integer(), nullable=True))
+    op.add_column('moduleinstance', sa.Column('score', sa.Integer(), nullable=True))
+    op.create_index('ix_tryoutinstance_tryout_id', 'tryoutinstance', ['tryout_id'])
+    op.create_index('ix_moduleinstance_tryout_instance_id', 'moduleinstance', ['tryout_instance_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_moduleinstance_tryout_instance_id', table_name='moduleinstance')
+    op.drop_index('ix_tryoutinstance_tryout_id', table_name='tryoutinstance')
+    op.drop_column('moduleinstance', 'score')
+    op.drop_column('tryoutinstance', 'score')
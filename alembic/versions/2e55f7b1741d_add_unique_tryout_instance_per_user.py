@@ -0,0 +1,26 @@
+"""add unique tryout instance per user
+
+Revision ID: 2e55f7b1741d
+Revises: 2bc6c3625372
+Create Date: 2026-10-18 09:43:18.740736
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2e55f7b1741d'
+down_revision: Union[str, None] = '2bc6c3625372'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_unique_constraint('uq_tryoutinstance_tryout_user', 'tryoutinstance', ['tryout_id', 'user_id'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_tryoutinstance_tryout_user', 'tryoutinstance', type_='unique')
@@ -0,0 +1,55 @@
+"""add content hashes
+
+Revision ID: 6b815065e64a
+Revises: 071fd40a1bbd
+Create Date: 2026-10-18 10:04:57.111105
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from tryout.utils import content_hash
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6b815065e64a'
+down_revision: Union[str, None] = '071fd40a1bbd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('question', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.add_column('option', sa.Column('content_hash', sa.String(length=64), nullable=True))
+
+    # hashed in Python so stored hashes match tryout.utils.content_hash exactly;
+    # SQL's \s and lower() disagree with str.split() and str.lower() on Unicode
+    connection = op.get_bind()
+    for table in ('question', 'option'):
+        backfill_content_hashes(connection, table)
+
+    op.create_index('ix_question_content_hash', 'question', ['content_hash'])
+    op.create_index('ix_option_content_hash', 'option', ['content_hash'])
+
+
+def backfill_content_hashes(connection, table: str, batch_size: int = 1000) -> None:
+    select_batch = sa.text(
+        f'SELECT id, content FROM "{table}" WHERE content_hash IS NULL AND id > :after ORDER BY id LIMIT :limit'
+    )
+    update_row = sa.text(f'UPDATE "{table}" SET content_hash = :content_hash WHERE id = :id')
+    after = '00000000-0000-0000-0000-000000000000'
+    while True:
+        rows = connection.execute(select_batch, {'after': after, 'limit': batch_size}).all()
+        if not rows:
+            break
+        connection.execute(update_row, [{'id': str(id), 'content_hash': content_hash(content)} for id, content in rows])
+        after = str(rows[-1].id)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_option_content_hash', table_name='option')
+    op.drop_index('ix_question_content_hash', table_name='question')
+    op.drop_column('option', 'content_hash')
+    op.drop_column('question', 'content_hash')
@@ -0,0 +1,35 @@
+"""add revoked token table
+
+Revision ID: a4b0387fa302
+Revises: 281ec303de7e
+Create Date: 2026-10-18 10:19:23.358017
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4b0387fa302'
+down_revision: Union[str, None] = '281ec303de7e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('revokedToken',
+    sa.Column('key', sa.String(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index(op.f('ix_revokedToken_expires_at'), 'revokedToken', ['expires_at'], unique=False)
+    op.create_index(op.f('ix_revokedToken_created_at'), 'revokedToken', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_revokedToken_created_at'), table_name='revokedToken')
+    op.drop_index(op.f('ix_revokedToken_expires_at'), table_name='revokedToken')
+    op.drop_table('revokedToken')
@@ -0,0 +1,28 @@
+"""add tryout availability indexes
+
+Revision ID: b208193bd96a
+Revises: 2e55f7b1741d
+Create Date: 2026-10-18 09:50:31.864192
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b208193bd96a'
+down_revision: Union[str, None] = '2e55f7b1741d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_tryout_status_started_at_ended_at', 'tryout', ['status', 'started_at', 'ended_at'])
+    op.create_index('ix_tryout_updated_at_id', 'tryout', ['updated_at', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tryout_updated_at_id', table_name='tryout')
+    op.drop_index('ix_tryout_status_started_at_ended_at', table_name='tryout')
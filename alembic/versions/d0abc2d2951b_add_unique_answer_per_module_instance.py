@@ -0,0 +1,34 @@
+"""add unique answer per module instance and question
+
+Revision ID: d0abc2d2951b
+Revises: 77409de828ac
+Create Date: 2026-10-18 09:28:52.493824
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd0abc2d2951b'
+down_revision: Union[str, None] = '77409de828ac'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # keep the most recent answer when a module instance answered a question twice
+    op.execute("""
+        DELETE FROM answer a
+        USING answer b
+        WHERE a.module_instance_id = b.module_instance_id
+          AND a.question_id = b.question_id
+          AND (a.updated_at, a.id) < (b.updated_at, b.id)
+    """)
+    op.create_unique_constraint('uq_answer_module_instance_question', 'answer', ['module_instance_id', 'question_id'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_answer_module_instance_question', 'answer', type_='unique')
@@ -0,0 +1,163 @@
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from auth import crud, passwords, schemas
+from auth.cache import role_cache
+
+import asyncio
+import base64
+import binascii
+import csv
+import json
+import os
+import tempfile
+
+BATCH_SIZE = int(os.environ.get("USER_IMPORT_BATCH_SIZE", 500))
+MAX_LINE_BYTES = 64 * 1024
+RESULT_COLUMNS = ["line", "email", "status", "id", "detail"]
+
+class ImportFormatError(ValueError):
+    pass
+
+def decode_line(number, line):
+    if len(line) > MAX_LINE_BYTES:
+        return ImportFormatError(f"line {number} is longer than {MAX_LINE_BYTES} bytes")
+    try:
+        return line.decode("utf-8").rstrip("\r")
+    except UnicodeDecodeError:
+        return ImportFormatError(f"line {number} is not valid UTF-8")
+
+async def iter_lines(chunks):
+    """
+    Split an async stream of byte chunks into (line number, text) pairs.
+    A line that is not UTF-8 or is longer than MAX_LINE_BYTES comes back
+    as an ImportFormatError instead of its text; the rest of an overlong
+    line is skipped as it arrives rather than buffered.
+    """
+    pending = b""
+    number = 0
+    skipping = False
+    async for chunk in chunks:
+        if skipping:
+            end = chunk.find(b"\n")
+            if end < 0:
+                continue
+            chunk, skipping = chunk[end + 1:], False
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            number += 1
+            yield number, decode_line(number, line)
+        if len(pending) > MAX_LINE_BYTES:
+            number += 1
+            yield number, ImportFormatError(f"line {number} is longer than {MAX_LINE_BYTES} bytes")
+            pending, skipping = b"", True
+    if pending:
+        yield number + 1, decode_line(number + 1, pending)
+
+async def iter_records(chunks, format: str):
+    """
+    Parse an upload into (line number, dict) records. CSV uploads start
+    with a header row naming the columns; quoted fields must not span
+    lines. JSON-lines uploads hold one object per line.
+    """
+    header = None
+    async for number, line in iter_lines(chunks):
+        if isinstance(line, Exception):
+            if format == "csv" and header is None:
+                raise ImportFormatError(f"header row: {line}")
+            yield number, line
+            continue
+        if not line.strip():
+            continue
+        if format == "jsonl":
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                record = e
+            yield number, record if isinstance(record, (dict, Exception)) else ValueError("expected a JSON object")
+        elif header is None:
+            header = next(csv.reader([line]))
+        else:
+            yield number, dict(zip(header, next(csv.reader([line]))))
+
+def validate(record):
+    """Return (UserImport, plain password) or raise ValueError with a reason."""
+    if isinstance(record, Exception):
+        raise ValueError(str(record))
+    try:
+        user = schemas.UserImport(**record)
+    except ValidationError as e:
+        raise ValueError("; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors()))
+    try:
+        password = base64.b64decode(user.password.encode("ascii"), validate=True).decode("utf-8")
+    except (binascii.Error, UnicodeError):
+        raise ValueError("password must be base64 encoded")
+    return user, password
+
+def insert_batch(db: Session, users):
+    unknown_roles = {user.role_id for user, _ in users if role_cache.get_type(db, user.role_id) is None}
+    rows = [
+        {"name": user.name, "email": user.email, "password": password, "role_id": user.role_id, "avatar": user.avatar}
+        for user, password in users
+        if user.role_id not in unknown_roles
+    ]
+    return crud.create_users(db, rows), unknown_roles
+
+async def import_users(db: Session, chunks, format: str, batch_size: int = BATCH_SIZE):
+    """
+    Create users from a streamed CSV or JSON-lines upload. Rows are
+    validated as they arrive, hashed in parallel on the password pool and
+    inserted `batch_size` at a time; only one batch is held in memory.
+    Returns a spooled CSV file with one result row per input row and the
+    count of rows per status. Batches are committed as they go, so if the
+    upload or an insert fails part way the rows written so far are still
+    returned, followed by an "error" row; rows without a result row were
+    not imported.
+    """
+    results = tempfile.SpooledTemporaryFile(max_size=1024 * 1024, mode="w+", newline="")
+    writer = csv.writer(results)
+    writer.writerow(RESULT_COLUMNS)
+    counts = {"created": 0, "exists": 0, "duplicate": 0, "invalid": 0, "error": 0}
+
+    def record(number, email, status, id="", detail=""):
+        writer.writerow([number, email, status, id, detail])
+        counts[status] += 1
+
+    async def flush(batch):
+        hashes = await asyncio.gather(*[asyncio.wrap_future(passwords.submit_hash(password)) for _, _, password in batch])
+        users = [(user, hashed) for (_, user, _), hashed in zip(batch, hashes)]
+        created, unknown_roles = await run_in_threadpool(insert_batch, db, users)
+        for number, user, _ in batch:
+            if user.role_id in unknown_roles:
+                record(number, user.email, "invalid", detail="role not found")
+            elif user.email in created:
+                record(number, user.email, "created", id=created[user.email])
+            else:
+                record(number, user.email, "exists", detail="email already exists")
+
+    try:
+        batch, batch_emails = [], set()
+        async for number, row in iter_records(chunks, format):
+            try:
+                user, password = validate(row)
+            except ValueError as e:
+                record(number, row.get("email", "") if isinstance(row, dict) else "", "invalid", detail=str(e))
+                continue
+            # repeats in earlier batches are already stored and come back as "exists"
+            if user.email in batch_emails:
+                record(number, user.email, "duplicate", detail="email appears earlier in the upload")
+                continue
+            batch_emails.add(user.email)
+
+            batch.append((number, user, password))
+            if len(batch) >= batch_size:
+                await flush(batch)
+                batch, batch_emails = [], set()
+        await flush(batch)
+    except Exception as e:
+        record("", "", "error", detail=str(e) or type(e).__name__)
+
+    results.seek(0)
+    return results, counts
@@ -0,0 +1,140 @@
+from collections import OrderedDict
+from auth import models
+from hashlib import sha256
+
+import os
+import threading
+import time
+
+class TokenCache:
+    """
+    Bounded LRU map from a token's sha256 digest to its verified claims,
+    served only until the token's `exp`. Digests are also indexed by the
+    `id` claim so every cached token of a user can be dropped at once.
+    Tokens without an `exp` are never cached.
+    """
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._by_user = {}
+        self._lock = threading.Lock()
+
+    def get(self, token: str):
+        digest = sha256(token.encode("utf-8")).digest()
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            claims, expires_at = entry
+            if expires_at <= time.time():
+                self._remove(digest)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return dict(claims)
+
+    def set(self, token: str, claims: dict):
+        expires_at = claims.get("exp")
+        if not isinstance(expires_at, (int, float)):
+            return
+
+        digest = sha256(token.encode("utf-8")).digest()
+        with self._lock:
+            self._entries[digest] = (dict(claims), expires_at)
+            self._entries.move_to_end(digest)
+            self._by_user.setdefault(claims.get("id"), set()).add(digest)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def discard(self, token: str):
+        with self._lock:
+            self._remove(sha256(token.encode("utf-8")).digest())
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for digest in self._by_user.pop(str(user_id), ()):
+                self._entries.pop(digest, None)
+
+    def _remove(self, digest):
+        entry = self._entries.pop(digest, None)
+        if entry is None:
+            return
+        digests = self._by_user.get(entry[0].get("id"))
+        if digests is not None:
+            digests.discard(digest)
+            if not digests:
+                del self._by_user[entry[0].get("id")]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+class RoleCache:
+    """
+    The whole userRole table as an id -> type map. Loaded on first use (or
+    at startup), reloaded after `max_age` seconds so role changes made by
+    other workers are picked up, and cleared by the role CRUD functions.
+    An unknown id triggers at most one reload per `min_reload` seconds.
+    """
+
+    def __init__(self, max_age: float = 300.0, min_reload: float = 1.0):
+        self.max_age = max_age
+        self.min_reload = min_reload
+        self.hits = 0
+        self.loads = 0
+        self._types = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def load(self, db):
+        types = {role.id: role.type for role in db.query(models.UserRole.id, models.UserRole.type)}
+        with self._lock:
+            self._types = types
+            self._loaded_at = time.monotonic()
+            self.loads += 1
+        return types
+
+    def get_type(self, db, role_id):
+        with self._lock:
+            types = self._types
+            age = time.monotonic() - self._loaded_at
+        if types is None or age > self.max_age or (role_id not in types and age > self.min_reload):
+            types = self.load(db)
+        else:
+            with self._lock:
+                self.hits += 1
+        return types.get(role_id)
+
+    def clear(self):
+        with self._lock:
+            self._types = None
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._types or ()), "hits": self.hits, "loads": self.loads}
+
+token_cache = TokenCache(maxsize=int(os.environ.get("TOKEN_CACHE_SIZE", 10000)))
+
+role_cache = RoleCache(max_age=float(os.environ.get("ROLE_CACHE_MAX_AGE", 300)))
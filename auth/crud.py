@@ -1,9 +1,16 @@
+from sqlalchemy import desc, func, or_, select, tuple_
 from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert
 from auth import models, schemas
+from auth.cache import role_cache
+from pagination import encode_cursor, decode_cursor
 
+import os
 import uuid
 import re
 
+EXACT_COUNT_LIMIT = int(os.environ.get("USER_EXACT_COUNT_LIMIT", 10000))
+
 def create_user(db: Session, user: schemas.UserCreate):
     try:
         new_user = models.User(
@@ -19,6 +26,27 @@ def create_user(db: Session, user: schemas.UserCreate):
     except Exception as e:
         raise ValueError(handle_exception(e))
     
+def create_users(db: Session, rows: list[dict]):
+    """
+    Insert many users with one statement, skipping emails that already
+    exist. Returns {email: id} for the rows actually inserted.
+    """
+    if not rows:
+        return {}
+    try:
+        result = db.execute(
+            insert(models.User)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=[models.User.email])
+            .returning(models.User.email, models.User.id)
+        )
+        created = dict(result.all())
+        db.commit()
+        return created
+    except Exception as e:
+        db.rollback()
+        raise ValueError(handle_exception(e))
+
 def create_user_role(db: Session, user_role: schemas.UserRoleCreate):
     try:
         new_role = models.UserRole(
@@ -27,6 +55,7 @@ def create_user_role(db: Session, user_role: schemas.UserRoleCreate):
         )
         db.add(new_role)
         db.commit()
+        role_cache.clear()
         db.refresh(new_role)
         return new_role
     except Exception as e:
@@ -38,6 +67,61 @@ def get_user(db: Session, user_id: uuid.UUID):
 def get_user_by_email(db: Session, email: str):
     return db.query(models.User).filter(models.User.email == email).first()
 
+def get_users(db: Session, limit: int = 50, cursor: str = None, role_id: int = None, q: str = None):
+    """
+    Users newest first, paginated by a (created_at, id) keyset cursor and
+    optionally filtered by role and a case-insensitive name or email prefix.
+    The total is only computed for the first page (no cursor): an exact
+    count when the planner expects at most EXACT_COUNT_LIMIT matches,
+    otherwise the planner's estimate.
+    """
+    query = select(models.User)
+    if role_id is not None:
+        query = query.where(models.User.role_id == role_id)
+    if q:
+        pattern = escape_like(q.lower()) + "%"
+        query = query.where(or_(
+            func.lower(models.User.name).like(pattern, escape="\\"),
+            func.lower(models.User.email).like(pattern, escape="\\")
+        ))
+    total, total_is_estimate = None, None
+    if not cursor:
+        total, total_is_estimate = count_users(db, query)
+    else:
+        try:
+            created_at, user_id = decode_cursor(cursor)
+        except (TypeError, ValueError):
+            raise ValueError("invalid cursor")
+        query = query.where(tuple_(models.User.created_at, models.User.id) < (created_at, user_id))
+
+    users = db.scalars(
+        query.order_by(desc(models.User.created_at), desc(models.User.id)).limit(limit + 1)
+    ).all()
+
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = encode_cursor(users[-1].created_at, users[-1].id)
+
+    return schemas.UserPage(
+        users=[schemas.UserSummary.model_validate(user) for user in users],
+        next_cursor=next_cursor,
+        total=total,
+        total_is_estimate=total_is_estimate
+    )
+
+def count_users(db: Session, query):
+    """Returns (count, is_estimate) for the rows matched by `query`."""
+    compiled = query.with_only_columns(models.User.id).compile(db.get_bind())
+    plan = db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()
+    estimate = int(plan[0]["Plan"]["Plan Rows"])
+    if estimate > EXACT_COUNT_LIMIT:
+        return estimate, True
+    return db.scalar(select(func.count()).select_from(query.subquery())), False
+
+def escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
 def get_all_roles(db: Session):
     return db.query(models.UserRole).all()
 
@@ -68,16 +152,18 @@ def update_role(db: Session, user_role_id: int, data: schemas.UserRoleBase):
         for key, value in data.items():
             setattr(user_role, key, value)
         db.commit()
+        role_cache.clear()
         db.refresh(user_role)
         return user_role
     except Exception as e:
         raise ValueError(handle_exception(e))
 
-def delete_user(db: Session, user_id: uuid.UUID):
+def delete_user(db: Session, user_id: uuid.UUID, commit: bool = True):
     affected_rows = db.query(models.User).filter(models.User.id == user_id).delete()
     if affected_rows == 0:
         raise LookupError("user not found")
-    db.commit()
+    if commit:
+        db.commit()
     return True
 
 def delete_user_role(db: Session, user_role_id: int):
@@ -90,8 +176,35 @@ def delete_user_role(db: Session, user_role_id: int):
     if affected_rows == 0:
         raise LookupError("role not found")
     db.commit()
+    role_cache.clear()
     return True
     
+def revoke(db: Session, key: str, expires_at):
+    """Persist a revocation and purge the ones that have expired."""
+    db.execute(
+        insert(models.RevokedToken)
+        .values(key=key, expires_at=expires_at)
+        .on_conflict_do_update(index_elements=[models.RevokedToken.key], set_={"expires_at": expires_at})
+    )
+    db.query(models.RevokedToken).filter(models.RevokedToken.expires_at < func.now()).delete(synchronize_session=False)
+    db.commit()
+
+def get_revocations(db: Session, since=None):
+    query = select(models.RevokedToken.key, models.RevokedToken.expires_at, models.RevokedToken.created_at).where(
+        models.RevokedToken.expires_at > func.now()
+    )
+    if since is not None:
+        query = query.where(models.RevokedToken.created_at > since)
+    return db.execute(query).all()
+
+def is_revoked(db: Session, keys: list[str]):
+    return db.scalar(
+        select(func.count()).select_from(models.RevokedToken).where(
+            models.RevokedToken.key.in_(keys),
+            models.RevokedToken.expires_at > func.now()
+        )
+    ) > 0
+
 def handle_exception(exception):
     pattern = r"Key \(([^)]+)\)"
     matches = re.findall(pattern, str(exception))
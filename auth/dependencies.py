@@ -0,0 +1,84 @@
+from fastapi import Cookie, Depends, HTTPException, Request
+from sqlalchemy.orm import Session
+
+from database import get_db
+from auth import crud, utils
+from auth.cache import role_cache
+from auth.revocation import revocations
+
+from typing import Annotated
+import jwt
+import threading
+import time
+
+class AuthzStats:
+    """Per-route count and cumulative seconds spent authorizing requests."""
+
+    def __init__(self):
+        self._routes = {}
+        self._lock = threading.Lock()
+
+    def record(self, route, elapsed, db_checked):
+        with self._lock:
+            entry = self._routes.setdefault(route, {"requests": 0, "seconds": 0.0, "db_checks": 0})
+            entry["requests"] += 1
+            entry["seconds"] += elapsed
+            entry["db_checks"] += db_checked
+
+    def stats(self):
+        with self._lock:
+            return {
+                route: {**entry, "mean_ms": 1000 * entry["seconds"] / entry["requests"]}
+                for route, entry in self._routes.items()
+            }
+
+authz_stats = AuthzStats()
+
+def current_user(request: Request, token: Annotated[str | None, Cookie()] = None, db: Session = Depends(get_db)):
+    """
+    Verified, unrevoked claims of the request's token. Decoded once per
+    request and kept on `request.state` for any later dependency or handler.
+    """
+    token_data = getattr(request.state, "token_data", None)
+    if token_data is not None:
+        return token_data
+
+    if not token:
+        raise HTTPException(status_code=401, detail="token not found")
+    try:
+        token_data = utils.jwt_decrypt(token)
+        revocations.check(db, token, token_data)
+    except jwt.ExpiredSignatureError:
+        raise HTTPException(status_code=401, detail="token expired")
+    except jwt.InvalidTokenError:
+        raise HTTPException(status_code=403, detail="invalid token")
+
+    request.state.token_data = token_data
+    return token_data
+
+def check_role(request: Request, db: Session, token_data: dict, role_type: str, verify: bool = False):
+    """
+    Raise 403 unless the token holder has `role_type`. Trusts the signed
+    `role` claim; with `verify` the user's current role is read from the
+    database instead, so a demoted or deleted admin is refused at once.
+    """
+    start = time.perf_counter()
+    try:
+        if verify:
+            user = crud.get_user(db, token_data.get("id"))
+            current_role = role_cache.get_type(db, user.role_id) if user else None
+        else:
+            # tokens issued before the role claim existed only carry role_id
+            current_role = token_data.get("role") or role_cache.get_type(db, token_data.get("role_id"))
+        if current_role != role_type:
+            raise HTTPException(status_code=403, detail="unauthorized")
+    finally:
+        route = request.scope.get("route")
+        authz_stats.record(route.path if route else request.url.path, time.perf_counter() - start, verify)
+
+def require_role(role_type: str, verify: bool = False):
+    def _require_role(request: Request, token_data: dict = Depends(current_user), db: Session = Depends(get_db)):
+        check_role(request, db, token_data, role_type, verify)
+        return token_data
+
+    return _require_role
@@ -0,0 +1,206 @@
+import jwt
+
+from hashlib import sha256
+
+import datetime
+import os
+import secrets
+import threading
+import time
+
+class UnknownKeyError(jwt.InvalidTokenError):
+    pass
+
+def key_id(key: bytes) -> str:
+    return sha256(key).hexdigest()[:16]
+
+class KeyRing:
+    """
+    HMAC signing keys held in memory and addressed by `kid`. The legacy
+    `key_path` and every `*.bin` file in `key_dir` are read once; the most
+    recently written key signs new tokens. A key replaced by a newer one
+    keeps verifying tokens for `max_token_age` after its replacement, then
+    is dropped. An unknown `kid` triggers a reload so keys rotated by
+    another worker are picked up without a restart, at most once per
+    `min_reload` seconds; a kid still unknown after a reload is refused
+    without reloading for `unknown_ttl` seconds.
+    """
+
+    def __init__(
+        self,
+        key_path: str = "aes_key.bin",
+        key_dir: str | None = None,
+        max_token_age: float = 86400.0,
+        min_reload: float = 1.0,
+        unknown_ttl: float = 60.0
+    ):
+        self.key_path = key_path
+        self.key_dir = key_dir
+        self.max_token_age = datetime.timedelta(seconds=max_token_age)
+        self.min_reload = min_reload
+        self.unknown_ttl = unknown_ttl
+        self.loads = 0
+        self.unknown_hits = 0
+        self._loaded_at = None
+        self._unknown = {}
+        self._keys = {}
+        self._active = None
+        self._legacy = None
+        self._retired = set()
+        self._header_kids = {}
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Merge every key file into the ring. Returns the active kid."""
+        found = []
+        legacy = None
+        if os.path.exists(self.key_path):
+            found.append(self._read(self.key_path))
+            legacy = key_id(found[0][1])
+        if self.key_dir and os.path.isdir(self.key_dir):
+            for name in os.listdir(self.key_dir):
+                if name.endswith(".bin"):
+                    found.append(self._read(os.path.join(self.key_dir, name)))
+        if not found:
+            raise FileNotFoundError(f"no signing key found at {self.key_path}")
+
+        found.sort(key=lambda entry: entry[0])
+        keys = {}
+        for (_, key), (replaced_at, _) in zip(found, found[1:] + [(None, None)]):
+            keys[key_id(key)] = (key, replaced_at)
+        newest = key_id(found[-1][1])
+        if newest in self._retired and self._active is None:
+            raise FileNotFoundError("every signing key on disk has expired")
+
+        now = datetime.datetime.now(tz=datetime.timezone.utc)
+        with self._lock:
+            # a key file not seen before takes over signing; keys rotated in
+            # memory only survive the reload
+            previous = self._active
+            takes_over = newest not in self._retired and (previous is None or newest not in self._keys)
+            for kid, (key, replaced_at) in keys.items():
+                if kid in self._retired:
+                    continue
+                known = self._keys.get(kid)
+                if known is not None and known[1] is not None:
+                    replaced_at = min(known[1], replaced_at) if replaced_at else known[1]
+                self._keys[kid] = (key, replaced_at)
+            if takes_over:
+                if previous is not None and previous != newest:
+                    self._keys[previous] = (self._keys[previous][0], self._keys[previous][1] or now)
+                self._active = newest
+            self._legacy = legacy
+            self._loaded_at = time.monotonic()
+            self.loads += 1
+            self._prune()
+            return self._active
+
+    def _read(self, path):
+        with open(path, "rb") as key_file:
+            modified_at = datetime.datetime.fromtimestamp(os.path.getmtime(path), tz=datetime.timezone.utc)
+            return modified_at, key_file.read()
+
+    def _prune(self):
+        now = datetime.datetime.now(tz=datetime.timezone.utc)
+        for kid, (_, replaced_at) in list(self._keys.items()):
+            if replaced_at is not None and replaced_at + self.max_token_age < now:
+                del self._keys[kid]
+                self._retired.add(kid)
+
+    def signing_key(self):
+        if self._active is None:
+            self.load()
+        with self._lock:
+            return self._active, self._keys[self._active][0]
+
+    def verification_key(self, kid: str | None):
+        """
+        Key for a token's `kid` header. Tokens issued before kids existed
+        carry none and are checked against the legacy key file.
+        """
+        if self._active is None:
+            self.load()
+        entry = self._keys.get(kid or self._legacy)
+        if entry is not None and entry[1] is not None:
+            with self._lock:
+                self._prune()
+                entry = self._keys.get(kid or self._legacy)
+        if entry is None and self._may_reload(kid):
+            self.load()
+            entry = self._keys.get(kid or self._legacy)
+            if entry is None:
+                with self._lock:
+                    if len(self._unknown) >= 1024:
+                        self._unknown.clear()
+                    self._unknown[kid] = time.monotonic()
+        if entry is None:
+            raise UnknownKeyError(f"unknown signing key {kid}")
+        return entry[0]
+
+    def _may_reload(self, kid: str | None) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            if self._loaded_at is not None and now - self._loaded_at < self.min_reload:
+                return False
+            checked_at = self._unknown.get(kid)
+            if checked_at is not None and now - checked_at < self.unknown_ttl:
+                self.unknown_hits += 1
+                return False
+            return True
+
+    def token_key(self, token: str):
+        """
+        Verification key for an encoded token. Tokens signed by one key share
+        their header segment, so the parsed kid is remembered per segment.
+        """
+        segment = token.split(".", 1)[0]
+        kid = self._header_kids.get(segment)
+        if kid is None:
+            kid = jwt.get_unverified_header(token).get("kid") or ""
+            if len(self._header_kids) >= 64:
+                self._header_kids.clear()
+            self._header_kids[segment] = kid
+        return self.verification_key(kid or None)
+
+    def rotate(self, key: bytes | None = None):
+        """
+        Make a new key the signing key. It is written to `key_dir` when one
+        is configured so other workers find it on their next unknown kid.
+        Returns the new kid.
+        """
+        if self._active is None:
+            self.load()
+
+        key = key or secrets.token_bytes(32)
+        kid = key_id(key)
+        if self.key_dir:
+            os.makedirs(self.key_dir, exist_ok=True)
+            with open(os.path.join(self.key_dir, f"{kid}.bin"), "wb") as key_file:
+                key_file.write(key)
+
+        now = datetime.datetime.now(tz=datetime.timezone.utc)
+        with self._lock:
+            previous, _ = self._keys[self._active]
+            self._keys[self._active] = (previous, now)
+            self._keys[kid] = (key, None)
+            self._active = kid
+            self._prune()
+        return kid
+
+    def stats(self):
+        with self._lock:
+            return {
+                "keys": len(self._keys),
+                "active": self._active,
+                "loads": self.loads,
+                "unknown": len(self._unknown),
+                "unknown_hits": self.unknown_hits
+            }
+
+keyring = KeyRing(
+    key_path=os.environ.get("JWT_KEY_PATH", "aes_key.bin"),
+    key_dir=os.environ.get("JWT_KEY_DIR"),
+    max_token_age=float(os.environ.get("JWT_MAX_TOKEN_AGE", 86400)),
+    min_reload=float(os.environ.get("JWT_KEY_MIN_RELOAD", 1)),
+    unknown_ttl=float(os.environ.get("JWT_UNKNOWN_KID_TTL", 60))
+)
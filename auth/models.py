@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, func, String, Integer, ForeignKey
+from sqlalchemy import Column, DateTime, func, String, Integer, ForeignKey, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -8,6 +8,12 @@ from database import Base
 
 class User(Base):
     __tablename__ = "user"
+    __table_args__ = (
+        Index("ix_user_created_at_id", "created_at", "id"),
+        Index("ix_user_role_id_created_at_id", "role_id", "created_at", "id"),
+        Index("ix_user_name_prefix", text("lower(name) text_pattern_ops")),
+        Index("ix_user_email_prefix", text("lower(email) text_pattern_ops")),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String)
@@ -27,4 +33,12 @@ class UserRole(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     type = Column(String, unique=True)
 
-    users = relationship("User", back_populates="role")
\ No newline at end of file
+    users = relationship("User", back_populates="role")
+
+class RevokedToken(Base):
+    __tablename__ = "revokedToken"
+
+    # "token:<sha256 of the token>" or "user:<user id>" for all of a user's tokens
+    key = Column(String, primary_key=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
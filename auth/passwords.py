@@ -0,0 +1,76 @@
+from concurrent.futures import ThreadPoolExecutor
+from auth import utils
+
+import base64
+import binascii
+import functools
+import hashlib
+import hmac
+import os
+
+SCRYPT_N = int(os.environ.get("PASSWORD_SCRYPT_N", 2 ** 14))
+SCRYPT_R = 8
+SCRYPT_P = 1
+
+# hashlib.scrypt releases the GIL, so a thread pool gives real parallelism;
+# its size bounds how many 16 MiB scrypt buffers exist at once
+executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("PASSWORD_HASH_WORKERS", os.cpu_count() or 4)),
+    thread_name_prefix="password-hash"
+)
+
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    return hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n, r=r, p=p, maxmem=256 * n * r + 1024 * 1024, dklen=32)
+
+def _hash(password: str) -> str:
+    salt = os.urandom(16)
+    digest = _scrypt(password, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    return "$".join([
+        "scrypt",
+        str(SCRYPT_N),
+        str(SCRYPT_R),
+        str(SCRYPT_P),
+        base64.b64encode(salt).decode("ascii"),
+        base64.b64encode(digest).decode("ascii")
+    ])
+
+def _verify(password: str, stored: str | None):
+    if not stored:
+        return False, False
+
+    if not stored.startswith("scrypt$"):
+        # legacy unsalted sha256 hex digest
+        return hmac.compare_digest(utils.hash_password(password), stored), True
+
+    try:
+        _, n, r, p, salt, digest = stored.split("$")
+        n, r, p = int(n), int(r), int(p)
+        valid = hmac.compare_digest(_scrypt(password, base64.b64decode(salt), n, r, p), base64.b64decode(digest))
+    except (ValueError, binascii.Error):
+        # malformed stored hash
+        return False, False
+    return valid, (n, r, p) != (SCRYPT_N, SCRYPT_R, SCRYPT_P)
+
+@functools.cache
+def dummy_hash() -> str:
+    """
+    Hash of a random secret with the current parameters. Verifying against
+    it when there is no account costs as much as a real check.
+    """
+    return _hash(base64.b64encode(os.urandom(32)).decode("ascii"))
+
+def hash_password(password: str) -> str:
+    """Versioned scrypt hash of `password`, computed on the hashing pool."""
+    return executor.submit(_hash, password).result()
+
+def submit_hash(password: str):
+    """Start hashing `password` on the pool and return the Future."""
+    return executor.submit(_hash, password)
+
+def verify_password(password: str, stored: str | None):
+    """
+    Check `password` against a stored hash of any supported version on the
+    hashing pool. Returns (valid, needs_rehash); needs_rehash is set for
+    legacy sha256 hashes and scrypt hashes with outdated parameters.
+    """
+    return executor.submit(_verify, password, stored).result()
@@ -0,0 +1,140 @@
+from sqlalchemy.orm import Session
+from auth import crud
+from auth.keyring import keyring
+
+from hashlib import sha256
+
+import datetime
+import jwt
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class RevokedTokenError(jwt.InvalidTokenError):
+    pass
+
+def token_key(token: str) -> str:
+    return "token:" + sha256(token.encode("utf-8")).hexdigest()
+
+def user_key(user_id) -> str:
+    return f"user:{user_id}"
+
+def fingerprint(key: str) -> int:
+    return int.from_bytes(sha256(key.encode("utf-8")).digest()[:8], "big")
+
+def sync_session(db: Session) -> Session:
+    # same database as the request, outside its transaction
+    return Session(bind=db.get_bind())
+
+class RevocationList:
+    """
+    Revoked tokens and users kept in memory as a map from a 64-bit
+    fingerprint of the revocation key to the time it lapses, which is when
+    the revoked token would have expired anyway. Checking a token is a
+    dict lookup; only a hit is confirmed against the revokedToken table,
+    so a fingerprint collision never refuses a valid token. Revocations
+    written by other workers are pulled in every `sync_interval` seconds on
+    a session that `session_factory` opens from the request's session, so
+    a failed sync never rolls back the request that triggered it.
+    """
+
+    # rows committed slightly after a later-stamped row are not skipped
+    SYNC_OVERLAP = datetime.timedelta(seconds=30)
+
+    def __init__(self, sync_interval: float = 5.0, session_factory=sync_session):
+        self.sync_interval = sync_interval
+        self.session_factory = session_factory
+        self.hits = 0
+        self.false_positives = 0
+        self.syncs = 0
+        self.failed_syncs = 0
+        self._expiry = {}
+        self._watermark = None
+        self._synced_at = None
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+
+    def add(self, key: str, expires_at: datetime.datetime):
+        with self._lock:
+            entry = fingerprint(key)
+            self._expiry[entry] = max(self._expiry.get(entry, 0.0), expires_at.timestamp())
+
+    def revoke_token(self, db: Session, token: str, claims: dict):
+        expires_at = datetime.datetime.fromtimestamp(claims["exp"], tz=datetime.timezone.utc)
+        self._revoke(db, token_key(token), expires_at)
+
+    def revoke_user(self, db: Session, user_id):
+        # every token of the user was issued at most max_token_age ago
+        expires_at = datetime.datetime.now(tz=datetime.timezone.utc) + keyring.max_token_age
+        self._revoke(db, user_key(user_id), expires_at)
+
+    def _revoke(self, db: Session, key: str, expires_at: datetime.datetime):
+        # commits whatever else the caller has pending in `db`
+        crud.revoke(db, key, expires_at)
+        self.add(key, expires_at)
+
+    def sync(self, db: Session):
+        since = self._watermark - self.SYNC_OVERLAP if self._watermark else None
+        rows = crud.get_revocations(db, since)
+        for key, expires_at, created_at in rows:
+            self.add(key, expires_at)
+            if self._watermark is None or created_at > self._watermark:
+                self._watermark = created_at
+
+        now = time.time()
+        with self._lock:
+            for entry in [entry for entry, expires_at in self._expiry.items() if expires_at <= now]:
+                del self._expiry[entry]
+            self.syncs += 1
+
+    def _maybe_sync(self, db: Session):
+        if self._synced_at is not None and time.monotonic() - self._synced_at < self.sync_interval:
+            return
+        if not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            self._synced_at = time.monotonic()
+            with self.session_factory(db) as sync_db:
+                self.sync(sync_db)
+        except Exception:
+            self.failed_syncs += 1
+            logger.exception("failed to sync token revocations")
+        finally:
+            self._sync_lock.release()
+
+    def is_revoked(self, db: Session, token: str, claims: dict) -> bool:
+        self._maybe_sync(db)
+
+        keys = [token_key(token)]
+        if claims.get("id"):
+            keys.append(user_key(claims["id"]))
+        now = time.time()
+        with self._lock:
+            candidates = [key for key in keys if self._expiry.get(fingerprint(key), 0.0) > now]
+        if not candidates:
+            return False
+
+        self.hits += 1
+        if crud.is_revoked(db, candidates):
+            return True
+        self.false_positives += 1
+        return False
+
+    def check(self, db: Session, token: str, claims: dict):
+        if self.is_revoked(db, token, claims):
+            raise RevokedTokenError("token revoked")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._expiry),
+                "hits": self.hits,
+                "false_positives": self.false_positives,
+                "syncs": self.syncs,
+                "failed_syncs": self.failed_syncs
+            }
+
+revocations = RevocationList(sync_interval=float(os.environ.get("REVOCATION_SYNC_INTERVAL", 5)))
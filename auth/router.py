@@ -1,15 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, Response, Cookie
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, Cookie
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from sqlalchemy.orm import Session
 
 from database import get_db
-from auth import schemas, crud, utils
+from auth import schemas, crud, utils, passwords, bulk_import
+from auth.cache import token_cache, role_cache
+from auth.throttle import client_address, login_throttle
+from auth.revocation import revocations
+from auth.dependencies import current_user, check_role, require_role, authz_stats
 
 from typing import Annotated
 import base64
 import json
 import uuid
-import jwt
 import datetime
+import jwt
 import os
 from dotenv import load_dotenv
 
@@ -18,7 +24,7 @@ load_dotenv()
 router = APIRouter()
 
 @router.post("/register")
-async def register(response: Response, user: schemas.UserCreate, db: Session = Depends(get_db)):
+def register(request: Request, response: Response, user: schemas.UserCreate, db: Session = Depends(get_db)):
     superadmins = os.environ["SUPERADMINS"]
     token = user.token
     if user.email in superadmins:
@@ -30,6 +36,7 @@ async def register(response: Response, user: schemas.UserCreate, db: Session = D
             "id": str(user.id),
             "name": str(user.name),
             "role_id": user.role_id,
+            "role": role_cache.get_type(db, user.role_id),
             "exp": exp
         }
 
@@ -48,21 +55,10 @@ async def register(response: Response, user: schemas.UserCreate, db: Session = D
         
         return {"user": user_info, "accessToken": token, "message": "register successful"}
 
-    role = crud.get_user_role_by_id(db, user.role_id)
-    if (role.type == "Admin") and not token:
-        raise HTTPException(status_code=401, detail="token not found")
-    
-    if (role.type == "Admin") and token:
-        try:
-            token_data = utils.jwt_decrypt(token)
-        except jwt.ExpiredSignatureError:
-            raise HTTPException(status_code=401, detail="token expired")
-        
-        user_role_id = token_data.get("role_id")
-        role = crud.get_user_role_by_id(db, user_role_id)
-        if role.type != "Admin":
-            raise HTTPException(status_code=403, detail="unauthorized")
-        
+    if role_cache.get_type(db, user.role_id) == "Admin":
+        token_data = current_user(request, token, db)
+        check_role(request, db, token_data, "Admin", verify=True)
+
     create_user(user, db)
     user = crud.get_user_by_email(db, user.email)
     exp =  datetime.datetime.now(tz=datetime.timezone.utc) + datetime.timedelta(days=1)
@@ -71,6 +67,7 @@ async def register(response: Response, user: schemas.UserCreate, db: Session = D
         "id": str(user.id),
         "name": str(user.name),
         "role_id": user.role_id,
+        "role": role_cache.get_type(db, user.role_id),
         "exp": exp
     }
 
@@ -92,7 +89,7 @@ async def register(response: Response, user: schemas.UserCreate, db: Session = D
 def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
     encoded_password = user.password
     decoded_password = base64.b64decode(encoded_password.encode("ascii")).decode("ascii")
-    hashed_password = utils.hash_password(decoded_password)
+    hashed_password = passwords.hash_password(decoded_password)
     user.password = hashed_password
 
     try:
@@ -102,19 +99,13 @@ def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=409, detail=str(e))
     
 @router.post("/role")
-async def register_role(role: schemas.UserRoleCreate, token: Annotated[str | None, Cookie()] = None, db: Session = Depends(get_db)):
+def register_role(request: Request, role: schemas.UserRoleCreate, token: Annotated[str | None, Cookie()] = None, db: Session = Depends(get_db)):
     superadmin_roles = os.environ["SUPERADMIN_ROLES"]
     if role.type in superadmin_roles:
         return create_role(role, db)
     
-    if not token:
-        raise HTTPException(status_code=401, detail="token not found")
-    
-    token_data = utils.jwt_decrypt(token)
-    role_id = token_data.get("role_id")
-    user_role = crud.get_user_role_by_id(db, role_id)
-    if user_role.type != "Admin":
-        raise HTTPException(status_code=403, detail="unauthorized")
+    token_data = current_user(request, token, db)
+    check_role(request, db, token_data, "Admin", verify=True)
     
     return create_role(role, db)
     
@@ -125,14 +116,34 @@ def create_role(role: schemas.UserRoleCreate, db: Session = Depends(get_db)):
     except ValueError as e:
         raise HTTPException(status_code=409, detail=str(e))
 
+def throttle_login(request: Request, email: str):
+    ip = client_address.resolve(request.client.host if request.client else None, request.headers.get("x-forwarded-for"))
+    retry_after = login_throttle.check(email, ip)
+    if retry_after:
+        raise HTTPException(status_code=429, detail="too many login attempts", headers={"Retry-After": str(retry_after)})
+
+def authenticate(db: Session, email: str, password: str):
+    user = crud.get_user_by_email(db, email)
+    if not user or not user.password:
+        # hash anyway so the response time does not reveal which emails exist
+        passwords.verify_password(password, passwords.dummy_hash())
+        return None
+
+    valid, needs_rehash = passwords.verify_password(password, user.password)
+    if not valid:
+        return None
+    if needs_rehash:
+        crud.update_user(db, user.id, {"password": passwords.hash_password(password)})
+    return user
+
 @router.post("/login")
-async def login(data: dict, response: Response, db: Session = Depends(get_db)):
+def login(request: Request, data: dict, response: Response, db: Session = Depends(get_db)):
+    throttle_login(request, data.get("email"))
     encoded_password = data.get("password")
     decoded_password = base64.b64decode(encoded_password.encode("ascii")).decode("ascii")
-    hashed_password = utils.hash_password(decoded_password)
 
-    user = crud.get_user_by_email(db, data.get("email"))
-    if (not user) or (user.password != hashed_password):
+    user = authenticate(db, data.get("email"), decoded_password)
+    if not user:
         raise HTTPException(status_code=401, detail="invalid credentials")
     
     exp =  datetime.datetime.now(tz=datetime.timezone.utc) + datetime.timedelta(days=1)
@@ -141,6 +152,7 @@ async def login(data: dict, response: Response, db: Session = Depends(get_db)):
         "id": str(user.id),
         "name": str(user.name),
         "role_id": user.role_id,
+        "role": role_cache.get_type(db, user.role_id),
         "exp": exp
     }
 
@@ -160,14 +172,13 @@ async def login(data: dict, response: Response, db: Session = Depends(get_db)):
     return {"user": user_info, "accessToken": token, "message": "login successful"}
 
 @router.post("/login_admin")
-async def login_admin(data: dict, response: Response, db: Session = Depends(get_db)):
+def login_admin(request: Request, data: dict, response: Response, db: Session = Depends(get_db)):
+    throttle_login(request, data.get("email"))
     encoded_password = data.get("password")
     decoded_password = base64.b64decode(encoded_password.encode("ascii")).decode("ascii")
-    hashed_password = utils.hash_password(decoded_password)
 
-    user = crud.get_user_by_email(db, data.get("email"))
-    user_role = crud.get_user_role_by_id(db, user.role_id)
-    if (not user) or (user.password != hashed_password) or (user_role.type != "Admin"):
+    user = authenticate(db, data.get("email"), decoded_password)
+    if (not user) or (role_cache.get_type(db, user.role_id) != "Admin"):
         raise HTTPException(status_code=401, detail="invalid credentials")
     
     exp =  datetime.datetime.now(tz=datetime.timezone.utc) + datetime.timedelta(days=1)
@@ -176,6 +187,7 @@ async def login_admin(data: dict, response: Response, db: Session = Depends(get_
         "id": str(user.id),
         "name": str(user.name),
         "role_id": user.role_id,
+        "role": role_cache.get_type(db, user.role_id),
         "exp": exp
     }
 
@@ -195,38 +207,32 @@ async def login_admin(data: dict, response: Response, db: Session = Depends(get_
     return {"user": user_info, "accessToken": token, "message": "login successful"}
     
 @router.get("/verify_token")
-async def verify(token: Annotated[str | None, Cookie()] = None):
+def verify(token: Annotated[str | None, Cookie()] = None, db: Session = Depends(get_db)):
     if not token:
         raise HTTPException(status_code=401, detail="token not found")
     
     try:
         token_data = utils.jwt_decrypt(token)
+        revocations.check(db, token, token_data)
         return {"message": "valid token", "data": token_data}
     except:
         raise HTTPException(status_code=403, detail="invalid token")
 
 @router.post("/update_info")
-async def update_info(data: dict, token: Annotated[str | None, Cookie()] = None, db: Session = Depends(get_db)):
+def update_info(request: Request, data: dict, token: Annotated[str | None, Cookie()] = None, db: Session = Depends(get_db)):
     if "id" in data:
         raise HTTPException(status_code=403, detail="id cannot be updated")
     
     if "role_id" in data:
         raise HTTPException(status_code=403, detail="role cannot be changed")
     
-    if not token:
-        raise HTTPException(status_code=401, detail="token not found")
-    
-    try:
-        token_data = utils.jwt_decrypt(token)
-        user_id = token_data.get("id")
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(status_code=401, detail="token expired")
+    user_id = current_user(request, token, db).get("id")
 
     try:
         if "password" in data.keys():
             encoded_password = data["password"]
             decoded_password = base64.b64decode(encoded_password.encode("ascii")).decode("ascii")
-            hashed_password = utils.hash_password(decoded_password)
+            hashed_password = passwords.hash_password(decoded_password)
 
             data["password"] = hashed_password
         crud.update_user(db, user_id, data)
@@ -237,20 +243,7 @@ async def update_info(data: dict, token: Annotated[str | None, Cookie()] = None,
     return {"message": "user updated successfully"}
 
 @router.post("/role/{id}")
-async def update_role(id: int, data: dict, token: Annotated[str | None, Cookie()] = None, db: Session = Depends(get_db)):
-    if not token:
-        raise HTTPException(status_code=401, detail="token not found")
-    
-    try:
-        token_data = utils.jwt_decrypt(token)
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(status_code=401, detail="token expired")
-    
-    role_id = token_data.get("role_id")
-    role = crud.get_user_role_by_id(db, role_id)
-    if role.type != "Admin":
-        raise HTTPException(status_code=403, detail="unauthorized")
-    
+def update_role(id: int, data: dict, token_data: dict = Depends(require_role("Admin", verify=True)), db: Session = Depends(get_db)):
     try:
         crud.update_role(db, id, data)
     except ValueError as e:
@@ -260,70 +253,86 @@ async def update_role(id: int, data: dict, token: Annotated[str | None, Cookie()
     return {"message": "role updated successfully"}
 
 @router.post("/logout")
-async def logout(response: Response):
+def logout(response: Response, token: Annotated[str | None, Cookie()] = None, db: Session = Depends(get_db)):
+    if token:
+        try:
+            revocations.revoke_token(db, token, utils.jwt_decrypt(token))
+        except (jwt.InvalidTokenError, KeyError):
+            pass
+        token_cache.discard(token)
     response.delete_cookie("token")
     return {"message": "success"}
 
 @router.post("/delete_user")
-async def delete_user(response: Response, token: Annotated[str | None, Cookie()] = None, db: Session = Depends(get_db)):
-    if not token:
-        raise HTTPException(status_code=401, detail="token not found")
+def delete_user(response: Response, token_data: dict = Depends(current_user), db: Session = Depends(get_db)):
+    user_id = token_data.get("id")
 
     try:
-        token_data = utils.jwt_decrypt(token)
-        user_id = token_data.get("id")
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(status_code=401, detail="token expired")
-
-    try:
-        crud.delete_user(db, user_id)
+        crud.delete_user(db, user_id, commit=False)
     except LookupError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    # commits the delete together with the revocation
+    revocations.revoke_user(db, user_id)
+    token_cache.invalidate_user(user_id)
     
     response.delete_cookie("token")
     return {"message": "user deleted successfully"}
 
-@router.post("/delete_user/{id}")
-async def delete_user_for_admin(id: uuid.UUID, token: Annotated[str | None, Cookie()] = None, db: Session = Depends(get_db)):
-    if not token:
-        raise HTTPException(status_code=401, detail="token not found")
-    
+@router.get("/users", response_model=schemas.UserPage)
+def list_users(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = None,
+    role_id: int | None = None,
+    q: str | None = Query(None, min_length=1),
+    token_data: dict = Depends(require_role("Admin")),
+    db: Session = Depends(get_db)
+):
     try:
-        token_data = utils.jwt_decrypt(token)
-        role_id = token_data.get("role_id")
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(status_code=401, detail="token expired")
-    
-    role = crud.get_user_role_by_id(db, role_id)
-    if role.type != "Admin":
-        raise HTTPException(status_code=403, detail="unauthorized")
-    
+        return crud.get_users(db, limit, cursor, role_id, q)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/import_users")
+async def import_users(request: Request, token_data: dict = Depends(require_role("Admin", verify=True)), db: Session = Depends(get_db)):
+    content_type = request.headers.get("content-type", "")
+    if "csv" in content_type:
+        format = "csv"
+    elif "json" in content_type:
+        format = "jsonl"
+    else:
+        raise HTTPException(status_code=415, detail="upload must be text/csv or application/x-ndjson")
+
+    results, counts = await bulk_import.import_users(db, request.stream(), format)
+    headers = {"Content-Disposition": 'attachment; filename="import_results.csv"'}
+    headers.update({f"X-Import-{status.capitalize()}": str(count) for status, count in counts.items()})
+    return StreamingResponse(results, media_type="text/csv", headers=headers, background=BackgroundTask(results.close))
+
+@router.post("/delete_user/{id}")
+def delete_user_for_admin(id: uuid.UUID, token_data: dict = Depends(require_role("Admin", verify=True)), db: Session = Depends(get_db)):
     try:
-        crud.delete_user(db, id)
+        crud.delete_user(db, id, commit=False)
     except LookupError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    # commits the delete together with the revocation
+    revocations.revoke_user(db, id)
+    token_cache.invalidate_user(id)
     
     return {"message": "user deleted successfully"}
 
 @router.post("/role/{id}/delete")
-async def delete_role(id: int, token: Annotated[str | None, Cookie()] = None, db: Session = Depends(get_db)):
-    if not token:
-        raise HTTPException(status_code=401, detail="token not found")
-    
-    try:
-        token_data = utils.jwt_decrypt(token)
-        role_id = token_data.get("role_id")
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(status_code=401, detail="token expired")
-
-    role = crud.get_user_role_by_id(db, role_id)
-    if role.type != "Admin":
-        raise HTTPException(status_code=403, detail="unauthorized")
-    
+def delete_role(id: int, token_data: dict = Depends(require_role("Admin", verify=True)), db: Session = Depends(get_db)):
     try:
         crud.delete_user_role(db, id)
     except ValueError as e:
         raise HTTPException(status_code=403, detail=str(e))
     except LookupError as e:
         raise HTTPException(status_code=404, detail=str(e))
-    return {"message": "role deleted successfully"}
\ No newline at end of file
+    return {"message": "role deleted successfully"}
+
+@router.get("/authz_stats")
+def get_authz_stats(token_data: dict = Depends(require_role("Admin"))):
+    return authz_stats.stats()
+
+@router.get("/throttle_stats")
+def get_throttle_stats(token_data: dict = Depends(require_role("Admin"))):
+    return login_throttle.stats()
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import List, Optional
 
+import datetime
 import uuid
 
 class UserBase(BaseModel):
@@ -13,10 +14,29 @@ class UserCreate(UserBase):
     password: str
     token: str
 
+class UserImport(UserBase):
+    password: str
+
 class User(UserBase):
     id: uuid.UUID
     model_config = {"from_attributes": True}
 
+class UserSummary(BaseModel):
+    id: uuid.UUID
+    name: Optional[str] = None
+    email: Optional[str] = None
+    role_id: Optional[int] = None
+    avatar: Optional[str] = None
+    created_at: Optional[datetime.datetime] = None
+    model_config = {"from_attributes": True}
+
+class UserPage(BaseModel):
+    users: List[UserSummary]
+    next_cursor: Optional[str] = None
+    # only set on the first page
+    total: Optional[int] = None
+    total_is_estimate: Optional[bool] = None
+
 class UserRoleBase(BaseModel):
     id: int
     type: str
@@ -0,0 +1,138 @@
+from collections import OrderedDict
+
+import ipaddress
+import math
+import os
+import threading
+import time
+
+class TokenBuckets:
+    """
+    One token bucket per key holding up to `capacity` tokens and refilled
+    at `rate` tokens per second. At most `maxsize` buckets are kept; the
+    least recently used one is dropped first, which at worst hands that
+    key a fresh, full bucket.
+    """
+
+    def __init__(self, capacity: float, rate: float, maxsize: int = 100000):
+        self.capacity = capacity
+        self.rate = rate
+        self.maxsize = maxsize
+        self.allowed = 0
+        self.rejected = 0
+        self.evictions = 0
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, now: float | None = None) -> float:
+        """Spend one token. Returns 0 when allowed, else seconds until one is available."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated_at) * self.rate)
+
+            if tokens < 1:
+                self._buckets[key] = (tokens, now)
+                self._buckets.move_to_end(key)
+                self.rejected += 1
+                return (1 - tokens) / self.rate
+
+            self._buckets[key] = (tokens - 1, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+                self.evictions += 1
+            self.allowed += 1
+            return 0.0
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._buckets),
+                "allowed": self.allowed,
+                "rejected": self.rejected,
+                "evictions": self.evictions
+            }
+
+class ClientAddress:
+    """
+    The address a request came from. Behind a reverse proxy every request
+    arrives from the proxy itself, so when the peer is one of
+    `trusted_proxies` (addresses or CIDR networks) the X-Forwarded-For
+    chain is read from the right and the first untrusted hop is used.
+    Forwarded headers from any other peer are ignored, since clients can
+    set them freely.
+    """
+
+    def __init__(self, trusted_proxies=()):
+        self.trusted_proxies = [
+            ipaddress.ip_network(proxy.strip(), strict=False) for proxy in trusted_proxies if proxy.strip()
+        ]
+
+    def _trusted(self, address):
+        try:
+            address = ipaddress.ip_address(address)
+        except ValueError:
+            return False
+        return any(address in network for network in self.trusted_proxies)
+
+    def resolve(self, peer, forwarded_for=None):
+        if not peer or not forwarded_for or not self._trusted(peer):
+            return peer
+        for address in reversed(forwarded_for.split(",")):
+            address = address.strip()
+            if address and not self._trusted(address):
+                return address
+        return peer
+
+class LoginThrottle:
+    """
+    Login attempts limited per email address and, unless `by_ip` is None,
+    per client IP.
+    """
+
+    def __init__(self, by_ip: TokenBuckets | None, by_email: TokenBuckets):
+        self.by_ip = by_ip
+        self.by_email = by_email
+
+    def check(self, email, ip) -> int:
+        """Returns 0 when the attempt may proceed, else the Retry-After seconds."""
+        wait = self.by_ip.take(ip) if self.by_ip and ip else 0.0
+        if not wait and email:
+            wait = self.by_email.take(str(email).strip().lower())
+        return math.ceil(wait)
+
+    def clear(self):
+        if self.by_ip:
+            self.by_ip.clear()
+        self.by_email.clear()
+
+    def stats(self):
+        return {"ip": self.by_ip.stats() if self.by_ip else None, "email": self.by_email.stats()}
+
+# Deploy note: the per-email buckets are always on. The per-IP buckets
+# are off unless LOGIN_IP_THROTTLE=1, because one address often stands for
+# many users: a school or office behind NAT, or every client at once when
+# the app runs behind a proxy without TRUSTED_PROXIES set to the proxy
+# addresses. Before turning them on, set TRUSTED_PROXIES so the real client
+# address is used, and size LOGIN_IP_BURST for the largest group expected
+# to log in together from one address (a full exam hall, not one person);
+# LOGIN_IP_PER_MINUTE only governs how fast that burst refills.
+client_address = ClientAddress(os.environ.get("TRUSTED_PROXIES", "").split(","))
+
+login_throttle = LoginThrottle(
+    by_ip=TokenBuckets(
+        capacity=float(os.environ.get("LOGIN_IP_BURST", 1000)),
+        rate=float(os.environ.get("LOGIN_IP_PER_MINUTE", 600)) / 60,
+        maxsize=int(os.environ.get("LOGIN_THROTTLE_SIZE", 100000))
+    ) if os.environ.get("LOGIN_IP_THROTTLE", "0") == "1" else None,
+    by_email=TokenBuckets(
+        capacity=float(os.environ.get("LOGIN_EMAIL_BURST", 10)),
+        rate=float(os.environ.get("LOGIN_EMAIL_PER_MINUTE", 5)) / 60,
+        maxsize=int(os.environ.get("LOGIN_THROTTLE_SIZE", 100000))
+    )
+)
@@ -1,26 +1,32 @@
 import jwt
 
 from hashlib import sha256
+from auth.keyring import keyring
+from auth.cache import token_cache
 
 def get_key():
-    with open("aes_key.bin", "rb") as key_file:
-        key = key_file.read()
-        return key
+    return keyring.signing_key()[1]
 
 def jwt_encrypt(data):
-    key = get_key()
+    kid, key = keyring.signing_key()
     header = {
         "alg": "HS256",
-        "typ": "JWT"
+        "typ": "JWT",
+        "kid": kid
     }
 
     payload = data
     return jwt.encode(payload, key, algorithm='HS256', headers=header)
 
 def jwt_decrypt(data):
-    key = get_key()
-    return jwt.decode(data, key, algorithms=['HS256'])
+    claims = token_cache.get(data)
+    if claims is not None:
+        return claims
+
+    key = keyring.token_key(data)
+    claims = jwt.decode(data, key, algorithms=['HS256'])
+    token_cache.set(data, claims)
+    return claims
 
 def hash_password(password):
     return sha256(password.encode("utf-8")).hexdigest()
-
@@ -0,0 +1,69 @@
+"""
+Compare how many concurrent DB-bound requests one worker can serve when a
+handler calls the sync Session from `async def`, which blocks the event
+loop, or from a plain `def` that FastAPI runs in its threadpool. Each
+request runs `SELECT pg_sleep(delay)` against
+SUPABASE_DB_URL.
+
+    python bench/bench_db_concurrency.py --requests 12 --delay 0.05
+    python bench/bench_db_concurrency.py --requests 50 /threadpool
+
+Keep /blocking below the sync pool size (15 connections): past that, the
+blocked loop cannot run the dependency teardown that returns connections,
+and requests stall until the pool times out.
+"""
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+import argparse
+import asyncio
+import httpx
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import engine, get_db
+
+app = FastAPI()
+DELAY = 0.05
+
+@app.get("/blocking")
+async def blocking(db: Session = Depends(get_db)):
+    db.execute(text("SELECT pg_sleep(:delay)"), {"delay": DELAY})
+    return {}
+
+@app.get("/threadpool")
+def threadpool(db: Session = Depends(get_db)):
+    db.execute(text("SELECT pg_sleep(:delay)"), {"delay": DELAY})
+    return {}
+
+async def run(path: str, requests: int):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get(path)
+        start = time.perf_counter()
+        responses = await asyncio.gather(*[client.get(path) for _ in range(requests)])
+        elapsed = time.perf_counter() - start
+    assert all(response.status_code == 200 for response in responses)
+    return elapsed
+
+async def main():
+    global DELAY
+    args = argparse.ArgumentParser()
+    args.add_argument("--requests", type=int, default=12)
+    args.add_argument("--delay", type=float, default=0.05)
+    args.add_argument("paths", nargs="*", default=["/blocking", "/threadpool"])
+    args = args.parse_args()
+    DELAY = args.delay
+
+    print(f"{args.requests} concurrent requests, {DELAY * 1000:.0f}ms query each")
+    for path in args.paths:
+        elapsed = await run(path, args.requests)
+        print(f"{path:<12} {elapsed:7.3f}s  {args.requests / elapsed:8.1f} req/s")
+    engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,65 @@
+"""
+Encode and decode throughput of the JWT helpers when the signing key is
+read from aes_key.bin on every call (the old `get_key`) versus served from
+the in-memory keyring. The keyring row verifies every token in full; the
+"cached" row is `utils.jwt_decrypt`, which repeat tokens serve from the
+token cache.
+
+    python bench/bench_jwt.py --iterations 20000
+"""
+import argparse
+import datetime
+import jwt
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from auth import utils
+from auth.keyring import keyring
+
+def read_key_file():
+    with open(keyring.key_path, "rb") as key_file:
+        return key_file.read()
+
+def file_encode(payload):
+    return jwt.encode(payload, read_key_file(), algorithm="HS256", headers={"alg": "HS256", "typ": "JWT"})
+
+def file_decode(token):
+    return jwt.decode(token, read_key_file(), algorithms=["HS256"])
+
+def keyring_decode(token):
+    return jwt.decode(token, keyring.token_key(token), algorithms=["HS256"])
+
+def measure(function, argument, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        function(argument)
+    return iterations / (time.perf_counter() - start)
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--iterations", type=int, default=20000)
+    args = arg_parser.parse_args()
+
+    payload = {
+        "id": "8b0c4e8e-5a43-4f0b-9d7e-0c6f1a1b2c3d",
+        "name": "bench",
+        "role_id": 1,
+        "exp": datetime.datetime.now(tz=datetime.timezone.utc) + datetime.timedelta(days=1)
+    }
+    keyring.load()
+    file_token = file_encode(payload)
+    ring_token = utils.jwt_encrypt(payload)
+
+    print(f"{'':<10}{'encode/s':>12}{'decode/s':>12}")
+    for name, encode, decode, token in (
+        ("file", file_encode, file_decode, file_token),
+        ("keyring", utils.jwt_encrypt, keyring_decode, ring_token),
+        ("cached", utils.jwt_encrypt, utils.jwt_decrypt, ring_token),
+    ):
+        print(f"{name:<10}{measure(encode, payload, args.iterations):>12.0f}{measure(decode, token, args.iterations):>12.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,23 @@
 from fastapi import FastAPI
+from contextlib import asynccontextmanager
 from auth.router import router as auth_router
+from auth.keyring import keyring
+from auth.cache import role_cache
 from tryout.router import router as tryout_router
+from tryout.crud import answer_buffer
 from payment.router import router as payment_router
+from database import SessionLocal
 
-app = FastAPI(docs_url="/api/db/docs")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    keyring.load()
+    with SessionLocal() as db:
+        role_cache.load(db)
+    answer_buffer.start()
+    yield
+    answer_buffer.stop()
+
+app = FastAPI(docs_url="/api/db/docs", lifespan=lifespan)
 
 app.include_router(auth_router, prefix="/api/db/auth")
 app.include_router(tryout_router, prefix="/api/db/tryout")
@@ -0,0 +1,15 @@
+from dateutil import parser
+
+import base64
+import uuid
+
+def encode_cursor(timestamp, id) -> str:
+    """Opaque keyset cursor for a (timestamp, uuid) sort key."""
+    raw = f"{timestamp.isoformat()}|{id}"
+    return base64.urlsafe_b64encode(raw.encode("ascii")).decode("ascii")
+
+def decode_cursor(cursor: str):
+    """Inverse of `encode_cursor`. Raises ValueError on a malformed cursor."""
+    raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("ascii")
+    timestamp, id = raw.split("|")
+    return parser.isoparse(timestamp), uuid.UUID(id)
@@ -8,7 +8,7 @@ router = APIRouter()
 
 
 @router.get("/transaction/{transaction_id}", response_model=schema.Transaction)
-async def get_transaction(transaction_id: str, db: Session = Depends(get_db)):
+def get_transaction(transaction_id: str, db: Session = Depends(get_db)):
     try:
         transaction = crud.get_transaction(db, transaction_id)
         if transaction is None:
@@ -19,7 +19,7 @@ async def get_transaction(transaction_id: str, db: Session = Depends(get_db)):
 
 
 @router.get("/transactions/", response_model=list[schema.Transaction])
-async def get_transactions(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def get_transactions(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
     try:
         return crud.get_transactions(db, skip=skip, limit=limit)
     except ValueError as e:
@@ -27,7 +27,7 @@ async def get_transactions(skip: int = 0, limit: int = 100, db: Session = Depend
 
 
 @router.get("/transactions/user/{user_id}", response_model=list[schema.Transaction])
-async def get_transactions_by_user(user_id: str, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def get_transactions_by_user(user_id: str, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
     try:
         return crud.get_transactions_by_user(db, user_id, skip=skip, limit=limit)
     except ValueError as e:
@@ -35,7 +35,7 @@ async def get_transactions_by_user(user_id: str, skip: int = 0, limit: int = 100
     
 
 @router.get("/transactions/tryout/{tryout_id}", response_model=list[schema.Transaction])
-async def get_transactions_by_tryout(tryout_id: str, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def get_transactions_by_tryout(tryout_id: str, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
     try:
         return crud.get_transactions_by_tryout(db, tryout_id, skip=skip, limit=limit)
     except ValueError as e:
@@ -43,7 +43,7 @@ async def get_transactions_by_tryout(tryout_id: str, skip: int = 0, limit: int =
     
 
 @router.post("/transaction/", response_model=schema.Transaction)
-async def create_transaction(transaction: schema.TransactionCreate, db: Session = Depends(get_db)):
+def create_transaction(transaction: schema.TransactionCreate, db: Session = Depends(get_db)):
     try:
         return crud.create_transaction(db, transaction)
     except ValueError as e:
@@ -51,7 +51,7 @@ async def create_transaction(transaction: schema.TransactionCreate, db: Session
     
 
 @router.put("/transaction/{transaction_id}", response_model=schema.Transaction)
-async def update_transaction(transaction_id: str, updated_transaction: schema.TransactionCreate, db: Session = Depends(get_db)):
+def update_transaction(transaction_id: str, updated_transaction: schema.TransactionCreate, db: Session = Depends(get_db)):
     try:
         return crud.update_transaction(db, transaction_id, updated_transaction)
     except ValueError as e:
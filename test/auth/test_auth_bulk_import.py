@@ -0,0 +1,89 @@
+from auth import bulk_import
+from auth.bulk_import import iter_lines, iter_records, ImportFormatError, MAX_LINE_BYTES
+from concurrent.futures import Future
+
+import asyncio
+import base64
+import csv
+import pytest
+
+async def stream(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+async def collect(iterator):
+    return [item async for item in iterator]
+
+def test_iter_lines_across_chunks():
+    lines = asyncio.run(collect(iter_lines(stream(b"a,b\r\nc", b",d\ne", b",f"))))
+
+    assert lines == [(1, "a,b"), (2, "c,d"), (3, "e,f")]
+
+def test_iter_lines_skips_long_line():
+    lines = asyncio.run(collect(iter_lines(stream(b"a\n", b"x" * (MAX_LINE_BYTES + 1), b"x" * 10, b"x\nb\n"))))
+
+    assert lines[0] == (1, "a")
+    assert lines[1][0] == 2 and isinstance(lines[1][1], ImportFormatError)
+    assert lines[2] == (3, "b")
+
+def test_iter_lines_invalid_utf8():
+    lines = asyncio.run(collect(iter_lines(stream(b"a\n\xff\xfe\nb"))))
+
+    assert lines[0] == (1, "a")
+    assert lines[1][0] == 2 and isinstance(lines[1][1], ImportFormatError)
+    assert lines[2] == (3, "b")
+
+def test_iter_records_csv_header():
+    records = asyncio.run(collect(iter_records(stream(b"name,email\n\nann,ann@gmail.com\n"), "csv")))
+
+    assert records == [(3, {"name": "ann", "email": "ann@gmail.com"})]
+
+def fake_import(monkeypatch):
+    inserted = []
+
+    def submit_hash(password):
+        future = Future()
+        future.set_result("hashed-" + password)
+        return future
+
+    def insert_batch(db, users):
+        inserted.append([user.email for user, _ in users])
+        return {user.email: f"id-{user.email}" for user, _ in users}, set()
+
+    monkeypatch.setattr(bulk_import.passwords, "submit_hash", submit_hash)
+    monkeypatch.setattr(bulk_import, "insert_batch", insert_batch)
+    return inserted
+
+def upload_row(name):
+    password = base64.b64encode(b"secret").decode("ascii")
+    return f"{name},{name}@gmail.com,{password},1\n".encode()
+
+def read_results(results):
+    return list(csv.DictReader(results))
+
+def test_import_users_invalid_utf8_after_first_batch(monkeypatch):
+    inserted = fake_import(monkeypatch)
+    chunks = stream(b"name,email,password,role_id\n", upload_row("one"), upload_row("two"), b"\xff\xfe,bad\n", upload_row("three"))
+
+    results, counts = asyncio.run(bulk_import.import_users(None, chunks, "csv", batch_size=2))
+    rows = read_results(results)
+
+    assert inserted == [["one@gmail.com", "two@gmail.com"], ["three@gmail.com"]]
+    assert [(row["line"], row["status"]) for row in rows] == [("2", "created"), ("3", "created"), ("4", "invalid"), ("5", "created")]
+    assert rows[2]["detail"] == "line 4 is not valid UTF-8"
+    assert counts == {"created": 3, "exists": 0, "duplicate": 0, "invalid": 1, "error": 0}
+
+def test_import_users_stream_failure_keeps_results(monkeypatch):
+    inserted = fake_import(monkeypatch)
+
+    async def broken():
+        yield b"name,email,password,role_id\n" + upload_row("one") + upload_row("two")
+        raise ConnectionError("client disconnected")
+
+    results, counts = asyncio.run(bulk_import.import_users(None, broken(), "csv", batch_size=1))
+    rows = read_results(results)
+
+    assert inserted == [["one@gmail.com"], ["two@gmail.com"]]
+    assert [row["status"] for row in rows] == ["created", "created", "error"]
+    assert rows[-1]["detail"] == "client disconnected"
+    assert counts["error"] == 1
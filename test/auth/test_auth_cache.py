@@ -0,0 +1,97 @@
+from auth.cache import TokenCache, RoleCache, token_cache
+from auth.utils import jwt_encrypt, jwt_decrypt
+
+from types import SimpleNamespace
+
+import datetime
+import time
+
+def claims(user_id="user", seconds=60):
+    return {"id": user_id, "exp": int(time.time()) + seconds}
+
+def test_token_cache_hit_and_miss():
+    cache = TokenCache(maxsize=2)
+
+    assert cache.get("token") == None
+    cache.set("token", claims())
+    assert cache.get("token")["id"] == "user"
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+def test_token_cache_expires_with_token():
+    cache = TokenCache(maxsize=2)
+    cache.set("token", claims(seconds=-1))
+
+    assert cache.get("token") == None
+    assert cache.stats()["size"] == 0
+
+def test_token_cache_skips_tokens_without_exp():
+    cache = TokenCache(maxsize=2)
+    cache.set("token", {"id": "user"})
+
+    assert cache.get("token") == None
+
+def test_token_cache_lru_eviction():
+    cache = TokenCache(maxsize=2)
+    cache.set("a", claims("a"))
+    cache.set("b", claims("b"))
+    cache.get("a")
+    cache.set("c", claims("c"))
+
+    assert cache.get("b") == None
+    assert cache.get("a")["id"] == "a"
+    assert cache.stats()["evictions"] == 1
+
+def test_token_cache_invalidation():
+    cache = TokenCache(maxsize=10)
+    cache.set("a", claims("user"))
+    cache.set("b", claims("user"))
+    cache.set("c", claims("other"))
+
+    cache.discard("c")
+    cache.invalidate_user("user")
+
+    assert cache.stats()["size"] == 0
+
+def test_jwt_decrypt_uses_cache():
+    token = jwt_encrypt({"id": "cached", "exp": datetime.datetime.now(tz=datetime.timezone.utc) + datetime.timedelta(minutes=1)})
+    hits = token_cache.stats()["hits"]
+
+    first = jwt_decrypt(token)
+    first["id"] = "altered"
+
+    assert jwt_decrypt(token)["id"] == "cached"
+    assert token_cache.stats()["hits"] == hits + 1
+
+class FakeRoleQuery:
+    def __init__(self, roles):
+        self.roles = roles
+        self.queries = 0
+
+    def query(self, *columns):
+        self.queries += 1
+        return [SimpleNamespace(id=role_id, type=role_type) for role_id, role_type in self.roles.items()]
+
+def test_role_cache_loads_once():
+    db = FakeRoleQuery({1: "User", 2: "Admin"})
+    cache = RoleCache(max_age=60)
+
+    assert cache.get_type(db, 2) == "Admin"
+    assert cache.get_type(db, 1) == "User"
+    assert db.queries == 1
+
+    cache.clear()
+    assert cache.get_type(db, 2) == "Admin"
+    assert db.queries == 2
+
+def test_role_cache_reloads_unknown_id():
+    db = FakeRoleQuery({1: "User"})
+    cache = RoleCache(max_age=60, min_reload=0)
+    cache.get_type(db, 1)
+
+    db.roles[3] = "Admin"
+    assert cache.get_type(db, 3) == "Admin"
+    assert db.queries == 2
@@ -4,6 +4,7 @@ import uuid
 from auth.models import User, UserRole
 from auth.utils import hash_password
 from auth.crud import *
+from auth.cache import role_cache
 
 @pytest.fixture()
 def db_session(db_session_global):
@@ -175,6 +176,13 @@ class TestAuthCRUD:
         
         assert updated_role.type == "Normal User"
 
+    def test_update_role_refreshes_role_cache(self, db_session):
+        assert role_cache.get_type(db_session, 1) == "User"
+
+        update_role(db_session, 1, {"type": "Normal User"})
+
+        assert role_cache.get_type(db_session, 1) == "Normal User"
+
     def test_fail_update_role(self, db_session):
         role = db_session.query(UserRole).filter(UserRole.id == 1).first()
         data = {
@@ -224,4 +232,38 @@ class TestAuthCRUD:
     def test_fail_delete_role_not_found(self, db_session):
         with pytest.raises(LookupError) as exc_info:
             delete_user_role(db_session, 999999999)
-        assert str(exc_info.value) == "role not found"
\ No newline at end of file
+        assert str(exc_info.value) == "role not found"
+
+    def test_successful_get_users(self, db_session):
+        first = get_users(db_session, limit=1)
+        second = get_users(db_session, limit=1, cursor=first.next_cursor)
+
+        assert first.total == 2
+        assert first.total_is_estimate == False
+        assert len(first.users) == 1
+        assert second.next_cursor == None
+        assert second.total == None
+        assert {first.users[0].email, second.users[0].email} == {"test@gmail.com", "test2@gmail.com"}
+
+    def test_successful_get_users_filtered(self, db_session):
+        assert get_users(db_session, role_id=2).users == []
+
+        result = get_users(db_session, q="TEST2")
+        assert [user.email for user in result.users] == ["test2@gmail.com"]
+        assert result.total == 1
+
+        assert get_users(db_session, q="test%").users == []
+        assert len(get_users(db_session, q="test_").users) == 2
+
+    def test_successful_get_users_estimated_total(self, db_session, monkeypatch):
+        monkeypatch.setattr("auth.crud.EXACT_COUNT_LIMIT", 0)
+
+        result = get_users(db_session)
+
+        assert result.total_is_estimate == True
+        assert result.total >= 1
+        assert len(result.users) == 2
+
+    def test_fail_get_users_invalid_cursor(self, db_session):
+        with pytest.raises(ValueError):
+            get_users(db_session, cursor="not a cursor")
@@ -0,0 +1,33 @@
+from auth.passwords import dummy_hash, hash_password, verify_password
+from auth import utils
+
+def test_hash_password_is_salted_and_versioned():
+    first = hash_password("password")
+    second = hash_password("password")
+
+    assert first.startswith("scrypt$")
+    assert first != second
+
+def test_verify_password():
+    hashed_password = hash_password("password")
+
+    assert verify_password("password", hashed_password) == (True, False)
+    assert verify_password("wrong", hashed_password) == (False, False)
+
+def test_verify_legacy_password_needs_rehash():
+    legacy = utils.hash_password("password")
+
+    assert verify_password("password", legacy) == (True, True)
+    assert verify_password("wrong", legacy)[0] == False
+
+def test_verify_missing_password():
+    assert verify_password("password", None) == (False, False)
+
+def test_verify_malformed_password():
+    assert verify_password("password", "scrypt$16384$8$1$not base64$") == (False, False)
+    assert verify_password("password", "scrypt$16384$8") == (False, False)
+    assert verify_password("password", "scrypt$many$8$1$c2FsdA==$ZGlnZXN0") == (False, False)
+
+def test_dummy_hash_is_fixed_and_current():
+    assert dummy_hash() == dummy_hash()
+    assert verify_password("", dummy_hash()) == (False, False)
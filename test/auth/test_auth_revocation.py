@@ -0,0 +1,80 @@
+from auth.revocation import RevocationList, sync_session, token_key, user_key
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+import datetime
+import time
+
+class FakeDB:
+    def __init__(self, revoked=()):
+        self.revoked = set(revoked)
+        self.confirmations = 0
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.closed = True
+
+def test_revocation_list_miss_needs_no_confirmation(monkeypatch):
+    monkeypatch.setattr("auth.revocation.crud.get_revocations", lambda db, since: [])
+    revocations = RevocationList(sync_interval=60, session_factory=lambda db: FakeDB())
+
+    assert revocations.is_revoked(FakeDB(), "token", {"id": "user", "exp": time.time() + 60}) == False
+    assert revocations.stats()["hits"] == 0
+
+def test_revocation_list_confirms_hits(monkeypatch):
+    def is_revoked(db, keys):
+        db.confirmations += 1
+        return any(key in db.revoked for key in keys)
+
+    monkeypatch.setattr("auth.revocation.crud.get_revocations", lambda db, since: [])
+    monkeypatch.setattr("auth.revocation.crud.is_revoked", is_revoked)
+    revocations = RevocationList(sync_interval=60, session_factory=lambda db: FakeDB())
+    expires_at = datetime.datetime.now(tz=datetime.timezone.utc) + datetime.timedelta(minutes=1)
+    revocations.add(token_key("revoked"), expires_at)
+    revocations.add(user_key("deleted"), expires_at)
+
+    db = FakeDB(revoked={token_key("revoked")})
+    assert revocations.is_revoked(db, "revoked", {"id": "user"}) == True
+    assert revocations.is_revoked(db, "other", {"id": "deleted"}) == False
+    assert db.confirmations == 2
+    assert revocations.stats()["false_positives"] == 1
+
+def test_revocation_list_sync_drops_expired(monkeypatch):
+    now = datetime.datetime.now(tz=datetime.timezone.utc)
+    rows = [(token_key("old"), now - datetime.timedelta(seconds=1), now), (token_key("new"), now + datetime.timedelta(minutes=1), now)]
+    monkeypatch.setattr("auth.revocation.crud.get_revocations", lambda db, since: rows)
+    revocations = RevocationList(sync_interval=60, session_factory=lambda db: FakeDB())
+
+    revocations.sync(FakeDB())
+
+    assert revocations.stats()["size"] == 1
+
+def test_revocation_list_syncs_on_its_own_session(monkeypatch):
+    sessions = []
+
+    def get_revocations(db, since):
+        sessions.append(db)
+        raise RuntimeError("database unavailable")
+
+    def session_factory(db):
+        return FakeDB()
+
+    monkeypatch.setattr("auth.revocation.crud.get_revocations", get_revocations)
+    revocations = RevocationList(sync_interval=60, session_factory=session_factory)
+    request_db = FakeDB()
+
+    assert revocations.is_revoked(request_db, "token", {"id": "user"}) == False
+    assert sessions[0] is not request_db
+    assert sessions[0].closed
+    assert revocations.stats()["failed_syncs"] == 1
+
+def test_sync_session_uses_the_request_bind():
+    engine = create_engine("sqlite://")
+    request_db = Session(bind=engine)
+
+    with sync_session(request_db) as db:
+        assert db is not request_db
+        assert db.get_bind() is engine
@@ -1,9 +1,16 @@
 from auth.models import User, UserRole
 from auth.utils import *
 from auth.crud import *
+from auth import crud, passwords
+from auth.passwords import verify_password
+from auth.throttle import login_throttle
+from auth.revocation import revocations
 
 import pytest
 import base64
+import csv
+import io
+import json
 
 @pytest.fixture()
 def db_session(db_session_global):
@@ -48,6 +55,7 @@ def db_session(db_session_global):
     session.add(user2)
     session.add(admin)
     session.commit()
+    login_throttle.clear()
 
     yield session
 
@@ -73,7 +81,7 @@ class TestAuthRouter:
         user = get_user_by_email(db_session, "new_user@gmail.com")
         assert user.name == "new_user"
         assert user.role_id == 1
-        assert user.password == hash_password("password")
+        assert verify_password("password", user.password) == (True, False)
 
     def test_successful_register_admin(self, client, db_session):
         data = {
@@ -96,7 +104,7 @@ class TestAuthRouter:
         user = get_user_by_email(db_session, "new_admin@gmail.com")
         assert user.name == "new_admin"
         assert user.role_id == 2
-        assert user.password == hash_password("password")
+        assert verify_password("password", user.password) == (True, False)
 
     def test_fail_register_admin_unauthorized_guest(self, client, db_session):
         client.post("api/auth/logout")
@@ -185,6 +193,25 @@ class TestAuthRouter:
         assert response.status_code == 403
         assert response.json()["detail"] == "unauthorized"
 
+    def test_fail_create_role_by_demoted_admin(self, client, db_session):
+        data = {
+            "email": "admin@gmail.com",
+            "password": base64.b64encode(b"password").decode("ascii")
+        }
+        client.post("api/auth/login", json=data)
+
+        admin = get_user_by_email(db_session, "admin@gmail.com")
+        update_user(db_session, admin.id, {"role_id": 1})
+
+        data = {
+            "id": 9,
+            "type": "Lecturer"
+        }
+        response = client.post("api/auth/role", json=data)
+
+        assert response.status_code == 403
+        assert response.json()["detail"] == "unauthorized"
+
     def test_fail_create_role_already_exists(self, client, db_session):
         data = {
             "email": "admin@gmail.com",
@@ -221,6 +248,20 @@ class TestAuthRouter:
         assert "role_id" in info.keys()
         assert info["name"] == "test_user"
 
+    def test_successful_login_rehashes_legacy_password(self, client, db_session):
+        data = {
+            "email": "test@gmail.com",
+            "password": base64.b64encode(b"password").decode("ascii")
+        }
+        response = client.post("api/auth/login", json=data)
+
+        assert response.status_code == 200
+        user = get_user_by_email(db_session, "test@gmail.com")
+        assert user.password.startswith("scrypt$")
+
+        response = client.post("api/auth/login", json=data)
+        assert response.status_code == 200
+
     def test_fail_login_wrong_password(self, client, db_session):
         data = {
             "email": "test@gmail.com",
@@ -231,7 +272,10 @@ class TestAuthRouter:
         assert response.status_code == 401
         assert response.json()["detail"] == "invalid credentials"
         
-    def test_fail_login_user_not_found(self, client, db_session):
+    def test_fail_login_user_not_found(self, client, db_session, monkeypatch):
+        checked = []
+        verify_password = passwords.verify_password
+        monkeypatch.setattr(passwords, "verify_password", lambda password, stored: checked.append(stored) or verify_password(password, stored))
         data = {
             "email": "whoami@gmail.com",
             "password": base64.b64encode(b"password").decode("ascii")
@@ -240,6 +284,8 @@ class TestAuthRouter:
 
         assert response.status_code == 401
         assert response.json()["detail"] == "invalid credentials"
+        # a missing account still costs one password check
+        assert checked == [passwords.dummy_hash()]
 
     def test_successful_update_info(self, client, db_session):
         data = {
@@ -591,3 +637,179 @@ class TestAuthRouter:
 
 
 
+
+    def test_login_token_carries_role_claim(self, client, db_session):
+        data = {
+            "email": "admin@gmail.com",
+            "password": base64.b64encode(b"password").decode("ascii")
+        }
+        response = client.post("api/auth/login", json=data)
+
+        assert jwt_decrypt(response.json()["accessToken"])["role"] == "Admin"
+
+    def test_fail_delete_user_by_demoted_admin(self, client, db_session):
+        data = {
+            "email": "admin@gmail.com",
+            "password": base64.b64encode(b"password").decode("ascii")
+        }
+        client.post("api/auth/login", json=data)
+
+        admin = get_user_by_email(db_session, "admin@gmail.com")
+        update_user(db_session, admin.id, {"role_id": 1})
+        user = get_user_by_email(db_session, "test@gmail.com")
+
+        response = client.post(f"api/auth/delete_user/{user.id}")
+
+        assert response.status_code == 403
+        assert response.json()["detail"] == "unauthorized"
+
+    def test_authz_stats(self, client, db_session):
+        data = {
+            "email": "admin@gmail.com",
+            "password": base64.b64encode(b"password").decode("ascii")
+        }
+        client.post("api/auth/login", json=data)
+        client.post("api/auth/role/99/delete")
+
+        response = client.get("api/auth/authz_stats")
+
+        assert response.status_code == 200
+        stats = response.json()
+        assert stats["/api/auth/role/{id}/delete"]["db_checks"] >= 1
+        assert stats["/api/auth/authz_stats"]["requests"] >= 1
+
+    def test_fail_login_throttled(self, client, db_session):
+        data = {
+            "email": "test@gmail.com",
+            "password": base64.b64encode(b"wrong").decode("ascii")
+        }
+        for _ in range(int(login_throttle.by_email.capacity)):
+            assert client.post("api/auth/login", json=data).status_code == 401
+
+        rejected = login_throttle.by_email.stats()["rejected"]
+        response = client.post("api/auth/login", json=data)
+
+        assert response.status_code == 429
+        assert response.json()["detail"] == "too many login attempts"
+        assert int(response.headers["Retry-After"]) > 0
+        assert login_throttle.by_email.stats()["rejected"] == rejected + 1
+
+    def test_successful_import_users(self, client, db_session):
+        data = {
+            "email": "admin@gmail.com",
+            "password": base64.b64encode(b"password").decode("ascii")
+        }
+        client.post("api/auth/login", json=data)
+
+        password = base64.b64encode(b"secret").decode("ascii")
+        upload = "\n".join([
+            "name,email,password,role_id",
+            f"student one,student1@gmail.com,{password},1",
+            f"existing,test@gmail.com,{password},1",
+            f"again,student1@gmail.com,{password},1",
+            f"bad email,not-an-email,{password},1",
+            f"no role,student2@gmail.com,{password},99",
+        ])
+        response = client.post("api/auth/import_users", content=upload, headers={"content-type": "text/csv"})
+
+        assert response.status_code == 200
+        assert response.headers["X-Import-Created"] == "1"
+        rows = {row["line"]: row for row in csv.DictReader(io.StringIO(response.text))}
+        assert [rows[line]["status"] for line in ["2", "3", "4", "5", "6"]] == ["created", "exists", "duplicate", "invalid", "invalid"]
+        assert rows["6"]["detail"] == "role not found"
+
+        user = get_user_by_email(db_session, "student1@gmail.com")
+        assert str(user.id) == rows["2"]["id"]
+        assert verify_password("secret", user.password) == (True, False)
+
+    def test_successful_import_users_json_lines(self, client, db_session):
+        data = {
+            "email": "admin@gmail.com",
+            "password": base64.b64encode(b"password").decode("ascii")
+        }
+        client.post("api/auth/login", json=data)
+
+        password = base64.b64encode(b"secret").decode("ascii")
+        upload = "\n".join([
+            json.dumps({"name": "student", "email": "student3@gmail.com", "password": password, "role_id": 1}),
+            "not json",
+        ])
+        response = client.post("api/auth/import_users", content=upload, headers={"content-type": "application/x-ndjson"})
+
+        assert response.status_code == 200
+        assert response.headers["X-Import-Created"] == "1"
+        assert response.headers["X-Import-Invalid"] == "1"
+
+    def test_fail_import_users_unauthorized(self, client, db_session):
+        data = {
+            "email": "test@gmail.com",
+            "password": base64.b64encode(b"password").decode("ascii")
+        }
+        client.post("api/auth/login", json=data)
+
+        response = client.post("api/auth/import_users", content="", headers={"content-type": "text/csv"})
+
+        assert response.status_code == 403
+
+    def test_logout_revokes_token(self, client, db_session):
+        data = {
+            "email": "test@gmail.com",
+            "password": base64.b64encode(b"password").decode("ascii")
+        }
+        token = client.post("api/auth/login", json=data).json()["accessToken"]
+        assert client.get("api/auth/verify_token").status_code == 200
+
+        client.post("api/auth/logout")
+        client.cookies.set("token", token)
+        response = client.get("api/auth/verify_token")
+
+        assert response.status_code == 403
+        assert response.json()["detail"] == "invalid token"
+        assert revocations.stats()["hits"] >= 1
+
+    def test_delete_user_revokes_all_tokens(self, client, db_session):
+        data = {
+            "email": "admin@gmail.com",
+            "password": base64.b64encode(b"password").decode("ascii")
+        }
+        admin_token = client.post("api/auth/login", json=data).json()["accessToken"]
+        data["email"] = "test@gmail.com"
+        user_token = client.post("api/auth/login", json=data).json()["accessToken"]
+        user = get_user_by_email(db_session, "test@gmail.com")
+
+        client.cookies.set("token", admin_token)
+        assert client.post(f"api/auth/delete_user/{user.id}").status_code == 200
+
+        client.cookies.set("token", user_token)
+        response = client.post("api/auth/update_info", json={"name": "ghost"})
+
+        assert response.status_code == 403
+        assert response.json()["detail"] == "invalid token"
+
+    def test_delete_user_commits_with_revocation(self, client, db_session, monkeypatch):
+        data = {
+            "email": "admin@gmail.com",
+            "password": base64.b64encode(b"password").decode("ascii")
+        }
+        admin_token = client.post("api/auth/login", json=data).json()["accessToken"]
+        client.cookies.set("token", admin_token)
+        user = get_user_by_email(db_session, "test@gmail.com")
+
+        events = []
+        commit, revoke = db_session.commit, crud.revoke
+
+        def record_commit():
+            events.append("commit")
+            commit()
+
+        def record_revoke(db, key, expires_at):
+            events.append("revoke")
+            revoke(db, key, expires_at)
+
+        monkeypatch.setattr(db_session, "commit", record_commit)
+        monkeypatch.setattr("auth.revocation.crud.revoke", record_revoke)
+        response = client.post(f"api/auth/delete_user/{user.id}")
+
+        assert response.status_code == 200
+        # the delete is not committed on its own before the revocation row is written
+        assert events == ["revoke", "commit"]
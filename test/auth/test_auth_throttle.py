@@ -0,0 +1,49 @@
+from auth.throttle import TokenBuckets, LoginThrottle, ClientAddress
+
+def test_token_bucket_burst_and_refill():
+    buckets = TokenBuckets(capacity=2, rate=1)
+
+    assert buckets.take("a", now=0) == 0
+    assert buckets.take("a", now=0) == 0
+    assert buckets.take("a", now=0) == 1
+    assert buckets.take("a", now=1) == 0
+
+    stats = buckets.stats()
+    assert stats["allowed"] == 3
+    assert stats["rejected"] == 1
+
+def test_token_bucket_lru_eviction():
+    buckets = TokenBuckets(capacity=1, rate=1, maxsize=2)
+    buckets.take("a", now=0)
+    buckets.take("b", now=0)
+    buckets.take("a", now=0)
+    buckets.take("c", now=0)
+
+    assert buckets.stats()["size"] == 2
+    assert buckets.stats()["evictions"] == 1
+    assert buckets.take("b", now=0) == 0
+
+def test_login_throttle_by_email_and_ip():
+    throttle = LoginThrottle(by_ip=TokenBuckets(capacity=3, rate=1), by_email=TokenBuckets(capacity=1, rate=0.1))
+
+    assert throttle.check("Test@gmail.com", "10.0.0.1") == 0
+    assert throttle.check("test@gmail.com ", "10.0.0.2") == 10
+    assert throttle.check("other@gmail.com", "10.0.0.1") == 0
+    assert throttle.check("third@gmail.com", "10.0.0.1") == 0
+    assert throttle.check("fourth@gmail.com", "10.0.0.1") == 1
+
+def test_login_throttle_without_ip_buckets():
+    throttle = LoginThrottle(by_ip=None, by_email=TokenBuckets(capacity=1, rate=0.1))
+
+    assert throttle.check("a@gmail.com", "10.0.0.1") == 0
+    assert throttle.check("b@gmail.com", "10.0.0.1") == 0
+    assert throttle.stats()["ip"] == None
+
+def test_client_address_trusts_only_configured_proxies():
+    address = ClientAddress(["10.0.0.0/8", " 192.168.1.1"])
+
+    assert address.resolve("10.1.2.3", "203.0.113.7, 10.9.9.9") == "203.0.113.7"
+    assert address.resolve("192.168.1.1", "198.51.100.1, 203.0.113.7") == "203.0.113.7"
+    assert address.resolve("10.1.2.3", None) == "10.1.2.3"
+    assert address.resolve("203.0.113.7", "198.51.100.1") == "203.0.113.7"
+    assert ClientAddress([""]).resolve("10.1.2.3", "203.0.113.7") == "10.1.2.3"
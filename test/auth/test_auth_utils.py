@@ -1,6 +1,8 @@
 from auth.utils import *
+from auth.keyring import KeyRing, UnknownKeyError, keyring
 
 import datetime
+import os
 import pytest
 import jwt
 
@@ -58,3 +60,55 @@ def test_jwt_expiration():
 
     with pytest.raises(jwt.ExpiredSignatureError):
         jwt_decrypt(token)
+
+def test_token_carries_kid():
+    token = jwt_encrypt({"id": "id"})
+
+    assert jwt.get_unverified_header(token)["kid"] == keyring.signing_key()[0]
+
+def test_key_rotation(tmp_path):
+    key_path = tmp_path / "aes_key.bin"
+    key_path.write_bytes(b"k" * 32)
+    os.utime(key_path, (0, 0))
+    ring = KeyRing(str(key_path), str(tmp_path / "keys"))
+    other_worker = KeyRing(str(key_path), str(tmp_path / "keys"))
+
+    old_kid, old_key = ring.signing_key()
+    old_token = jwt.encode({"id": "id"}, old_key, algorithm="HS256", headers={"kid": old_kid})
+    new_kid = ring.rotate()
+
+    assert new_kid != old_kid
+    assert other_worker.signing_key()[0] == new_kid
+    assert jwt.decode(old_token, ring.verification_key(old_kid), algorithms=["HS256"]) == {"id": "id"}
+    assert ring.verification_key(None) == old_key
+    with pytest.raises(UnknownKeyError):
+        ring.verification_key("unknown")
+
+def test_rotated_key_expires(tmp_path):
+    key_path = tmp_path / "aes_key.bin"
+    key_path.write_bytes(b"k" * 32)
+    ring = KeyRing(str(key_path), max_token_age=0)
+
+    old_kid = ring.load()
+    ring.rotate()
+
+    with pytest.raises(UnknownKeyError):
+        ring.verification_key(old_kid)
+
+def test_unknown_kid_reloads_are_limited(tmp_path):
+    key_path = tmp_path / "aes_key.bin"
+    key_path.write_bytes(b"k" * 32)
+    ring = KeyRing(str(key_path), str(tmp_path / "keys"), min_reload=0, unknown_ttl=60)
+    ring.load()
+
+    for _ in range(3):
+        with pytest.raises(UnknownKeyError):
+            ring.verification_key("unknown")
+    assert ring.stats()["loads"] == 2
+    assert ring.stats()["unknown_hits"] == 2
+
+    ring.min_reload = 60
+    for kid in ["first", "second", "third"]:
+        with pytest.raises(UnknownKeyError):
+            ring.verification_key(kid)
+    assert ring.stats()["loads"] == 2
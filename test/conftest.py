@@ -1,11 +1,12 @@
 #CREDIT: https://www.fastapitutorial.com/blog/unit-testing-in-fastapi/
 from typing import Any
 from typing import Generator
+from contextlib import contextmanager
 
 import pytest
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.orm import sessionmaker
 
 import sys
@@ -14,10 +15,12 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from database import Base, get_db
 from auth.router import router as auth_router
+from tryout.router import router as tryout_router
 
 def start_application():
     app = FastAPI()
     app.include_router(auth_router, prefix="/api/auth")
+    app.include_router(tryout_router, prefix="/api/tryout")
     return app
 
 SQLALCHEMY_DATABASE_URL = f"""
@@ -43,7 +46,7 @@ def app() -> Generator[FastAPI, Any, None]:
     table_names = reversed(Base.metadata.sorted_tables)
     
     # Drop tables using raw SQL queries
-    with engine.connect() as connection:
+    with engine.begin() as connection:
         for table_name in table_names:
             cmd = f"""DROP TABLE "{table_name}" CASCADE;"""
             connection.execute(text(cmd))
@@ -77,4 +80,29 @@ def client(
     app.dependency_overrides[get_db] = _get_test_db
     with TestClient(app) as client:
         yield client
-        
\ No newline at end of file
+        
+
+
+@pytest.fixture()
+def assert_max_queries():
+    """
+    Fail the test when the wrapped block sends more than `budget` statements
+    to the test database.
+    """
+    @contextmanager
+    def _assert_max_queries(budget: int):
+        statements = []
+
+        def _count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", _count)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", _count)
+        assert len(statements) <= budget, (
+            f"expected at most {budget} queries, got {len(statements)}:\n" + "\n".join(statements)
+        )
+
+    return _assert_max_queries
@@ -0,0 +1,100 @@
+import pytest
+import uuid
+
+from auth.cache import role_cache
+from auth.models import User, UserRole
+from auth.utils import jwt_encrypt
+from tryout.models import Tryout, TryoutInstance, ModuleInstance
+from tryout.schemas import CreateTryoutParams
+
+@pytest.fixture()
+def db_session(db_session_global):
+    session = db_session_global
+
+    yield session
+
+    session.rollback()
+    session.query(Tryout).delete()
+    session.query(User).delete()
+    session.commit()
+    session.close()
+
+@pytest.fixture()
+def make_tryout_params():
+    def _make_tryout_params(title="test_tryout", modules=2, questions=3, options=4):
+        data = {
+            "title": title,
+            "price": 10000,
+            "status": "active",
+            "started_at": "2024-06-01T08:00:00+07:00",
+            "ended_at": "2024-06-01T12:00:00+07:00",
+            "modules": [
+                {
+                    "title": f"module {m}",
+                    "module_order": m,
+                    "questions": [
+                        {
+                            "content": f"question {m}.{q}",
+                            "question_order": q,
+                            "options": [
+                                {
+                                    "content": f"option {m}.{q}.{o}",
+                                    "is_true": o == 0,
+                                    "option_order": o
+                                }
+                                for o in range(options)
+                            ]
+                        }
+                        for q in range(questions)
+                    ]
+                }
+                for m in range(modules)
+            ]
+        }
+        return CreateTryoutParams(**data)
+
+    return _make_tryout_params
+
+@pytest.fixture()
+def make_tryout_instance(db_session):
+    def _make_tryout_instance(tryout, email="candidate@gmail.com"):
+        user = User(name="candidate", email=email)
+        db_session.add(user)
+        db_session.flush()
+
+        tryout_instance = TryoutInstance(tryout_id=tryout.id, user_id=user.id, status="started")
+        db_session.add(tryout_instance)
+        db_session.flush()
+
+        for module in tryout.modules:
+            db_session.add(ModuleInstance(module_id=module.id, tryout_instance_id=tryout_instance.id))
+        db_session.commit()
+        db_session.refresh(tryout_instance)
+        return tryout_instance
+
+    return _make_tryout_instance
+
+@pytest.fixture()
+def make_admin(db_session):
+    def _make_admin(email="admin@gmail.com"):
+        role = db_session.query(UserRole).filter(UserRole.type == "Admin").first()
+        if role is None:
+            role = UserRole(id=3, type="Admin")
+            db_session.add(role)
+            db_session.flush()
+        user = User(name="admin", email=email, role_id=role.id)
+        db_session.add(user)
+        db_session.commit()
+        role_cache.clear()
+        return user
+
+    return _make_admin
+
+@pytest.fixture()
+def login_as(client):
+    def _login_as(role, user_id=None):
+        client.cookies.set("token", jwt_encrypt({"id": str(user_id or uuid.uuid4()), "role": role}))
+        return client
+
+    yield _login_as
+    client.cookies.clear()
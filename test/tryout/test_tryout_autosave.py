@@ -0,0 +1,78 @@
+from tryout.autosave import AnswerBuffer
+
+import pytest
+
+def make_buffer(**kwargs):
+    batches = []
+
+    def writer(rows):
+        batches.append(sorted(rows))
+        return len(rows)
+
+    return AnswerBuffer(writer, **kwargs), batches
+
+def test_buffer_keeps_last_answer_per_question():
+    buffer, batches = make_buffer()
+    buffer.put("instance", "question_1", "option_a")
+    buffer.put("instance", "question_1", "option_b")
+    buffer.put("instance", "question_2", "option_c")
+
+    assert buffer.flush() == 2
+    assert batches == [[("instance", "question_1", "option_b"), ("instance", "question_2", "option_c")]]
+
+    stats = buffer.stats()
+    assert stats["received"] == 3
+    assert stats["written"] == 2
+    assert stats["coalescing_ratio"] == 1.5
+
+def test_buffer_flush_single_module_instance():
+    buffer, batches = make_buffer()
+    buffer.put("instance_1", "question", "option_a")
+    buffer.put("instance_2", "question", "option_b")
+
+    assert buffer.flush("instance_1") == 1
+    assert batches == [[("instance_1", "question", "option_a")]]
+    assert buffer.stats()["pending"] == 1
+
+def test_buffer_flushes_when_full():
+    buffer, batches = make_buffer(max_pending=2, flush_interval=60)
+    buffer.start()
+    buffer.put("instance", "question_1", "option")
+    buffer.put("instance", "question_2", "option")
+    buffer.stop()
+
+    assert batches == [[("instance", "question_1", "option"), ("instance", "question_2", "option")]]
+
+def test_buffer_keeps_answers_when_write_fails():
+    def writer(rows):
+        raise RuntimeError("database unavailable")
+
+    buffer = AnswerBuffer(writer)
+    buffer.put("instance", "question", "option")
+
+    with pytest.raises(RuntimeError):
+        buffer.flush()
+    assert buffer.stats()["pending"] == 1
+    assert buffer.stats()["failed_flushes"] == 1
+
+def test_buffer_drops_answers_after_max_retries():
+    def writer(rows):
+        raise RuntimeError("database unavailable")
+
+    buffer = AnswerBuffer(writer, max_retries=2)
+    buffer.put("instance", "question", "option")
+
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            buffer.flush()
+    assert buffer.stats()["pending"] == 0
+    assert buffer.stats()["dropped"] == 1
+    assert buffer.stats()["failed_flushes"] == 3
+
+def test_buffer_counts_rows_the_writer_stored():
+    buffer = AnswerBuffer(lambda rows: len(rows) - 1)
+    buffer.put("instance", "question_1", "option")
+    buffer.put("instance", "question_2", "option")
+
+    assert buffer.flush() == 1
+    assert buffer.stats()["written"] == 1
@@ -0,0 +1,84 @@
+from tryout.cache import VersionedCache, BoundaryCache
+
+import datetime
+import time
+
+def test_cache_hit_and_miss():
+    cache = VersionedCache(maxsize=2, ttl=60)
+
+    assert cache.get("a", 1) == None
+    cache.set("a", 1, "tryout", "value")
+    assert cache.get("a", 1) == "value"
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+def test_cache_version_mismatch():
+    cache = VersionedCache(maxsize=2, ttl=60)
+    cache.set("a", 1, "tryout", "value")
+
+    assert cache.get("a", 2) == None
+    assert cache.get("a", 1) == None
+
+def test_cache_lru_eviction():
+    cache = VersionedCache(maxsize=2, ttl=60)
+    cache.set("a", 1, "tryout", "a")
+    cache.set("b", 1, "tryout", "b")
+    cache.get("a", 1)
+    cache.set("c", 1, "tryout", "c")
+
+    assert cache.get("b", 1) == None
+    assert cache.get("a", 1) == "a"
+    assert cache.get("c", 1) == "c"
+    assert cache.stats()["evictions"] == 1
+
+def test_cache_ttl_expiration():
+    cache = VersionedCache(maxsize=2, ttl=0.01)
+    cache.set("a", 1, "tryout", "a")
+    time.sleep(0.02)
+
+    assert cache.get("a", 1) == None
+
+def test_cache_invalidate_tryout():
+    cache = VersionedCache(maxsize=4, ttl=60)
+    cache.set("tryout", 1, "tryout_1", "tryout")
+    cache.set("module", 1, "tryout_1", "module")
+    cache.set("other", 1, "tryout_2", "other")
+    cache.invalidate_tryout("tryout_1")
+
+    assert cache.get("tryout", 1) == None
+    assert cache.get("module", 1) == None
+    assert cache.get("other", 1) == "other"
+
+def test_boundary_cache_expires_at_boundary():
+    cache = BoundaryCache(max_age=60)
+    now = datetime.datetime(2024, 6, 1, 8, 0, tzinfo=datetime.timezone.utc)
+    cache.set("active", ["tryout"], now + datetime.timedelta(seconds=10), now)
+
+    assert cache.get("active", now + datetime.timedelta(seconds=9)) == ["tryout"]
+    assert cache.get("active", now + datetime.timedelta(seconds=10)) == None
+
+def test_boundary_cache_caps_max_age():
+    cache = BoundaryCache(max_age=60)
+    now = datetime.datetime(2024, 6, 1, 8, 0, tzinfo=datetime.timezone.utc)
+    cache.set("active", [], None, now)
+
+    assert cache.get("active", now + datetime.timedelta(seconds=59)) == []
+    assert cache.get("active", now + datetime.timedelta(seconds=61)) == None
+
+def test_boundary_cache_evicts_least_recently_used():
+    cache = BoundaryCache(max_age=60, maxsize=2)
+    now = datetime.datetime(2024, 6, 1, 8, 0, tzinfo=datetime.timezone.utc)
+    cache.set("active", ["a"], None, now)
+    cache.set("draft", ["d"], None, now)
+    cache.get("active", now)
+
+    for status in [f"status {i}" for i in range(100)]:
+        cache.set(status, [], None, now)
+        cache.get("active", now)
+
+    assert cache.get("active", now) == ["a"]
+    assert cache.get("draft", now) == None
+    assert cache.stats()["size"] == 2
+    assert cache.stats()["evictions"] == 100
@@ -0,0 +1,394 @@
+import pytest
+import uuid
+import datetime
+
+from tryout.models import Tryout, Module, Question, Option, ModuleInstance, Answer
+from tryout.schemas import SubmitAnswersParams, OptionModuleParams, CloneTryoutParams
+from auth.models import User
+from tryout.crud import *
+
+class TestTryoutCRUD:
+    def test_successful_create_tryout(self, db_session, make_tryout_params):
+        result = create_tryout(db_session, make_tryout_params())
+
+        assert result.title == "test_tryout"
+        assert db_session.query(Module).filter(Module.tryout_id == result.id).count() == 2
+        assert db_session.query(Question).join(Module).filter(Module.tryout_id == result.id).count() == 6
+        assert db_session.query(Option).join(Question).join(Module).filter(Module.tryout_id == result.id).count() == 24
+
+    def test_fail_create_tryout_invalid_date(self, db_session, make_tryout_params):
+        params = make_tryout_params()
+        params.started_at = "not a date"
+
+        with pytest.raises(ValueError):
+            create_tryout(db_session, params)
+        assert db_session.query(Tryout).count() == 0
+
+    def test_get_tryout_query_budget(self, db_session, make_tryout_params, assert_max_queries):
+        tryout = create_tryout(db_session, make_tryout_params())
+        db_session.expunge_all()
+
+        with assert_max_queries(5):
+            result = get_tryout(db_session, tryout.id)
+
+        assert [module.module_order for module in result.modules] == [0, 1]
+        assert len(result.modules[0].questions) == 3
+        assert len(result.modules[0].questions[0].options) == 4
+
+        with assert_max_queries(1):
+            assert get_tryout(db_session, tryout.id) == result
+
+    def test_get_all_tryouts_query_budget(self, db_session, make_tryout_params, assert_max_queries):
+        for i in range(3):
+            create_tryout(db_session, make_tryout_params(title=f"test_tryout_{i}"))
+        db_session.expunge_all()
+
+        with assert_max_queries(4):
+            result = get_all_tryouts(db_session)
+
+        assert len(result) == 3
+
+    def test_get_module_by_id_query_budget(self, db_session, make_tryout_params, assert_max_queries):
+        tryout = create_tryout(db_session, make_tryout_params())
+        module_id = tryout.modules[0].id
+        db_session.expunge_all()
+
+        with assert_max_queries(4):
+            result = get_module_by_id(db_session, module_id)
+
+        assert result.id == module_id
+        assert len(result.questions) == 3
+
+        with assert_max_queries(1):
+            assert get_module_by_id(db_session, module_id) == result
+
+    def test_fail_get_tryout(self, db_session):
+        result = get_tryout(db_session, uuid.uuid4())
+
+        assert result == None
+
+    def test_successful_delete_tryout(self, db_session, make_tryout_params):
+        tryout = create_tryout(db_session, make_tryout_params())
+        tryout_id = tryout.id
+        module_id = tryout.modules[0].id
+        get_tryout(db_session, tryout_id)
+        get_module_by_id(db_session, module_id)
+
+        assert delete_tryout(db_session, tryout_id) == True
+        assert get_tryout(db_session, tryout_id) == None
+        assert get_module_by_id(db_session, module_id) == None
+
+    def test_fail_delete_tryout(self, db_session):
+        with pytest.raises(LookupError):
+            delete_tryout(db_session, uuid.uuid4())
+
+    def test_successful_get_tryout_summaries(self, db_session, make_tryout_params, assert_max_queries):
+        create_tryout(db_session, make_tryout_params(modules=2, questions=3))
+
+        with assert_max_queries(1):
+            result = get_tryout_summaries(db_session)
+
+        assert len(result.tryouts) == 1
+        assert result.tryouts[0].module_count == 2
+        assert result.tryouts[0].question_count == 6
+        assert result.next_cursor == None
+
+    def test_successful_paginate_tryout_summaries(self, db_session, make_tryout_params):
+        for i in range(5):
+            create_tryout(db_session, make_tryout_params(title=f"test_tryout_{i}", modules=1, questions=1))
+
+        seen = []
+        cursor = None
+        while True:
+            page = get_tryout_summaries(db_session, limit=2, cursor=cursor)
+            seen.extend(tryout.id for tryout in page.tryouts)
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+
+        assert len(seen) == 5
+        assert len(set(seen)) == 5
+
+    def test_successful_filter_tryout_summaries(self, db_session, make_tryout_params):
+        create_tryout(db_session, make_tryout_params(title="active_tryout"))
+        params = make_tryout_params(title="draft_tryout")
+        params.status = "draft"
+        params.started_at = "2024-07-01T08:00:00+07:00"
+        create_tryout(db_session, params)
+
+        result = get_tryout_summaries(db_session, status="draft")
+        assert [tryout.title for tryout in result.tryouts] == ["draft_tryout"]
+
+        result = get_tryout_summaries(db_session, started_after="2024-06-15T00:00:00+07:00")
+        assert [tryout.title for tryout in result.tryouts] == ["draft_tryout"]
+
+    def test_fail_get_tryout_summaries_invalid_cursor(self, db_session):
+        with pytest.raises(ValueError):
+            get_tryout_summaries(db_session, cursor="not a cursor")
+
+    def test_successful_submit_answers(self, db_session, make_tryout_params, make_tryout_instance):
+        tryout = create_tryout(db_session, make_tryout_params())
+        tryout_instance = make_tryout_instance(tryout)
+        module = tryout.modules[0]
+        module_instance = db_session.query(ModuleInstance).filter(
+            ModuleInstance.tryout_instance_id == tryout_instance.id,
+            ModuleInstance.module_id == module.id
+        ).first()
+
+        answers = SubmitAnswersParams(answers=[
+            {"question_id": question.id, "option_id": question.options[1].id} for question in module.questions
+        ])
+        assert submit_answers(db_session, module_instance.id, answers, tryout_instance.user_id) == 3
+
+        answers = SubmitAnswersParams(answers=[
+            {"question_id": question.id, "option_id": question.options[0].id} for question in module.questions
+        ])
+        assert submit_answers(db_session, module_instance.id, answers, tryout_instance.user_id) == 3
+
+        stored = db_session.query(Answer).filter(Answer.module_instance_id == module_instance.id).all()
+        assert len(stored) == 3
+        assert {answer.option_id for answer in stored} == {question.options[0].id for question in module.questions}
+
+    def test_fail_submit_answers_option_from_other_question(self, db_session, make_tryout_params, make_tryout_instance):
+        tryout = create_tryout(db_session, make_tryout_params())
+        tryout_instance = make_tryout_instance(tryout)
+        module = tryout.modules[0]
+        module_instance = db_session.query(ModuleInstance).filter(ModuleInstance.module_id == module.id).first()
+
+        answers = SubmitAnswersParams(answers=[
+            {"question_id": module.questions[0].id, "option_id": module.questions[1].options[0].id}
+        ])
+        with pytest.raises(ValueError) as exc_info:
+            submit_answers(db_session, module_instance.id, answers, tryout_instance.user_id)
+        assert str(exc_info.value) == "option does not belong to question"
+
+    def test_fail_submit_answers_question_from_other_module(self, db_session, make_tryout_params, make_tryout_instance):
+        tryout = create_tryout(db_session, make_tryout_params())
+        tryout_instance = make_tryout_instance(tryout)
+        module, other_module = tryout.modules
+        module_instance = db_session.query(ModuleInstance).filter(ModuleInstance.module_id == module.id).first()
+        question = other_module.questions[0]
+
+        answers = SubmitAnswersParams(answers=[{"question_id": question.id, "option_id": question.options[0].id}])
+        with pytest.raises(ValueError) as exc_info:
+            submit_answers(db_session, module_instance.id, answers, tryout_instance.user_id)
+        assert str(exc_info.value) == "question does not belong to module"
+        assert db_session.query(Answer).filter(Answer.module_instance_id == module_instance.id).count() == 0
+
+    def test_fail_submit_answers_other_users_module_instance(self, db_session, make_tryout_params, make_tryout_instance):
+        tryout = create_tryout(db_session, make_tryout_params())
+        tryout_instance = make_tryout_instance(tryout)
+        module = tryout.modules[0]
+        module_instance = db_session.query(ModuleInstance).filter(ModuleInstance.module_id == module.id).first()
+        question = module.questions[0]
+
+        answers = SubmitAnswersParams(answers=[{"question_id": question.id, "option_id": question.options[0].id}])
+        with pytest.raises(PermissionError):
+            submit_answers(db_session, module_instance.id, answers, uuid.uuid4())
+        assert db_session.query(Answer).filter(Answer.module_instance_id == module_instance.id).count() == 0
+
+    def test_fail_submit_answers_module_instance_not_found(self, db_session, make_tryout_params):
+        tryout = create_tryout(db_session, make_tryout_params())
+        question = tryout.modules[0].questions[0]
+
+        answers = SubmitAnswersParams(answers=[{"question_id": question.id, "option_id": question.options[0].id}])
+        with pytest.raises(LookupError):
+            submit_answers(db_session, uuid.uuid4(), answers, uuid.uuid4())
+
+    def test_successful_grade_tryout(self, db_session, make_tryout_params, make_tryout_instance):
+        tryout = create_tryout(db_session, make_tryout_params(modules=2, questions=3))
+        first = make_tryout_instance(tryout, email="first@gmail.com")
+        second = make_tryout_instance(tryout, email="second@gmail.com")
+
+        # first answers every question of module 0 correctly, second gets one right
+        module = tryout.modules[0]
+        for tryout_instance, correct in [(first, 3), (second, 1)]:
+            module_instance = db_session.query(ModuleInstance).filter(
+                ModuleInstance.tryout_instance_id == tryout_instance.id,
+                ModuleInstance.module_id == module.id
+            ).first()
+            answers = SubmitAnswersParams(answers=[
+                {"question_id": question.id, "option_id": question.options[0 if i < correct else 1].id}
+                for i, question in enumerate(module.questions)
+            ])
+            submit_answers(db_session, module_instance.id, answers, tryout_instance.user_id)
+
+        results = grade_tryout(db_session, tryout.id)
+
+        assert {row.id: row.score for row in results} == {first.id: 3, second.id: 1}
+        module_scores = db_session.query(ModuleInstance.module_id, ModuleInstance.score).filter(
+            ModuleInstance.tryout_instance_id == first.id
+        ).all()
+        assert dict(module_scores) == {tryout.modules[0].id: 3, tryout.modules[1].id: 0}
+
+        leaderboard = get_leaderboard(db_session, tryout.id)
+        assert leaderboard.total == 2
+        assert [entry.tryout_instance_id for entry in leaderboard.entries] == [first.id, second.id]
+        assert get_leaderboard_rank(db_session, tryout.id, second.id).rank == 2
+
+    def test_grade_tryout_ignores_answers_from_other_module(self, db_session, make_tryout_params, make_tryout_instance):
+        tryout = create_tryout(db_session, make_tryout_params(modules=2, questions=3))
+        tryout_instance = make_tryout_instance(tryout)
+        module, other_module = tryout.modules
+        module_instance = db_session.query(ModuleInstance).filter(
+            ModuleInstance.tryout_instance_id == tryout_instance.id,
+            ModuleInstance.module_id == module.id
+        ).first()
+
+        # rows written before answers were checked against the module
+        db_session.add_all([
+            Answer(module_instance_id=module_instance.id, question_id=question.id, option_id=question.options[0].id)
+            for question in module.questions[:1] + other_module.questions
+        ])
+        db_session.commit()
+
+        results = grade_tryout(db_session, tryout.id)
+
+        assert {row.id: row.score for row in results} == {tryout_instance.id: 1}
+        db_session.refresh(module_instance)
+        assert module_instance.score == 1
+
+    def test_leaderboard_reloads_only_when_grades_change(self, db_session, make_tryout_params, make_tryout_instance, monkeypatch):
+        tryout = create_tryout(db_session, make_tryout_params())
+        make_tryout_instance(tryout, email="first@gmail.com")
+        grade_tryout(db_session, tryout.id)
+        monkeypatch.setattr(leaderboards, "max_age", 0)
+
+        assert get_leaderboard(db_session, tryout.id).total == 1
+        loads = leaderboards.loads
+        assert get_leaderboard(db_session, tryout.id).total == 1
+        assert leaderboards.loads == loads
+
+        # graded by another worker
+        second = make_tryout_instance(tryout, email="second@gmail.com")
+        second.score = 2
+        db_session.commit()
+        assert get_leaderboard(db_session, tryout.id).total == 2
+        assert leaderboards.loads == loads + 1
+
+    def test_successful_start_session_is_idempotent(self, db_session, make_tryout_params, assert_max_queries):
+        tryout = create_tryout(db_session, make_tryout_params(modules=3))
+        user = User(name="candidate", email="candidate@gmail.com")
+        db_session.add(user)
+        db_session.commit()
+
+        tryout_id, user_id = tryout.id, user.id
+
+        with assert_max_queries(1):
+            first = start_session(db_session, tryout_id, user_id)
+        second = start_session(db_session, tryout_id, user_id)
+
+        assert len(first.module_instances) == 3
+        assert second.tryout_instance_id == first.tryout_instance_id
+        assert {m.module_instance_id for m in second.module_instances} == {m.module_instance_id for m in first.module_instances}
+        assert db_session.query(ModuleInstance).count() == 3
+
+    def test_fail_start_session_tryout_not_found(self, db_session):
+        user = User(name="candidate", email="candidate@gmail.com")
+        db_session.add(user)
+        db_session.commit()
+
+        with pytest.raises(LookupError) as exc_info:
+            start_session(db_session, uuid.uuid4(), user.id)
+        assert str(exc_info.value) == "tryout not found"
+
+    def test_fail_start_session_user_not_found(self, db_session, make_tryout_params):
+        tryout = create_tryout(db_session, make_tryout_params())
+
+        with pytest.raises(LookupError) as exc_info:
+            start_session(db_session, tryout.id, uuid.uuid4())
+        assert str(exc_info.value) == "user not found"
+
+    def test_successful_update_tryout_touches_only_changed_rows(self, db_session, make_tryout_params):
+        tryout = create_tryout(db_session, make_tryout_params(modules=2, questions=2, options=2))
+        tryout_id = tryout.id
+        module = tryout.modules[1]
+        unchanged_question_id = tryout.modules[0].questions[0].id
+        removed_question_id = module.questions[1].id
+
+        params = make_tryout_params(modules=2, questions=2, options=2)
+        params.modules[0].questions[1].content = "fixed typo"
+        params.modules[1].questions.pop()
+        params.modules[1].questions[0].options.append(
+            OptionModuleParams(content="new option", is_true=False, option_order=2)
+        )
+
+        result = update_tryout(db_session, tryout_id, params)
+
+        assert result == {"inserted": 1, "updated": 2, "deleted": 1}
+        assert db_session.get(Question, unchanged_question_id) is not None
+        assert db_session.get(Question, removed_question_id) is None
+
+        tree = get_tryout(db_session, tryout_id)
+        assert tree.modules[0].questions[1].content == "fixed typo"
+        assert len(tree.modules[1].questions) == 1
+        assert len(tree.modules[1].questions[0].options) == 3
+
+    def test_successful_update_tryout_without_changes(self, db_session, make_tryout_params):
+        tryout = create_tryout(db_session, make_tryout_params())
+
+        result = update_tryout(db_session, tryout.id, make_tryout_params())
+
+        assert result == {"inserted": 0, "updated": 0, "deleted": 0}
+
+    def test_fail_update_tryout_not_found(self, db_session, make_tryout_params):
+        with pytest.raises(LookupError):
+            update_tryout(db_session, uuid.uuid4(), make_tryout_params())
+
+    def test_successful_clone_tryout(self, db_session, make_tryout_params, assert_max_queries):
+        tryout = create_tryout(db_session, make_tryout_params(modules=2, questions=3, options=4))
+        tryout_id = tryout.id
+
+        with assert_max_queries(2):
+            result = clone_tryout(db_session, tryout_id, CloneTryoutParams(title="next season"))
+
+        assert result.id != tryout_id
+        assert result.title == "next season"
+        original = get_tryout(db_session, tryout_id)
+        cloned = get_tryout(db_session, result.id)
+        assert cloned.started_at == original.started_at
+        assert [m.title for m in cloned.modules] == [m.title for m in original.modules]
+        assert [q.content for q in cloned.modules[1].questions] == [q.content for q in original.modules[1].questions]
+        assert [o.is_true for o in cloned.modules[1].questions[2].options] == [o.is_true for o in original.modules[1].questions[2].options]
+        assert cloned.modules[0].questions[0].id != original.modules[0].questions[0].id
+
+    def test_fail_clone_tryout_not_found(self, db_session):
+        with pytest.raises(LookupError):
+            clone_tryout(db_session, uuid.uuid4(), CloneTryoutParams())
+
+    def test_successful_get_active_tryouts(self, db_session, make_tryout_params, assert_max_queries):
+        now = datetime.datetime.now(tz=datetime.timezone.utc)
+        windows = {
+            "open": (now - datetime.timedelta(hours=1), now + datetime.timedelta(hours=1)),
+            "upcoming": (now + datetime.timedelta(hours=2), now + datetime.timedelta(hours=3)),
+            "closed": (now - datetime.timedelta(hours=3), now - datetime.timedelta(hours=2)),
+        }
+        for title, (started_at, ended_at) in windows.items():
+            params = make_tryout_params(title=title, modules=1, questions=1)
+            params.started_at = started_at.isoformat()
+            params.ended_at = ended_at.isoformat()
+            create_tryout(db_session, params)
+
+        result = get_active_tryouts(db_session)
+        assert [tryout.title for tryout in result] == ["open"]
+
+        with assert_max_queries(0):
+            assert get_active_tryouts(db_session) == result
+
+    def test_successful_search_questions(self, db_session, make_tryout_params):
+        params = make_tryout_params(modules=1, questions=3)
+        params.modules[0].questions[0].content = "Hitunglah luas segitiga siku-siku"
+        params.modules[0].questions[1].content = "Hitunglah keliling segitiga sama sisi dan luas segitiga"
+        params.modules[0].questions[2].content = "Sebutkan ibu kota provinsi Jawa Barat"
+        tryout = create_tryout(db_session, params)
+
+        result = search_questions(db_session, "luas segitiga")
+
+        assert [r.content for r in result.results] == [
+            "Hitunglah keliling segitiga sama sisi dan luas segitiga",
+            "Hitunglah luas segitiga siku-siku"
+        ]
+        assert result.results[0].tryout_id == tryout.id
+
+        result = search_questions(db_session, "luas segitiga", limit=1, offset=1)
+        assert [r.content for r in result.results] == ["Hitunglah luas segitiga siku-siku"]
@@ -0,0 +1,103 @@
+from tryout.models import Tryout, Question
+from tryout.utils import content_hash
+from tryout.dedup import existing_hashes, duplicate_report, merge_duplicates
+from tryout.crud import create_tryout, update_tryout
+
+import importlib.util
+import pathlib
+
+def load_migration(name):
+    path = pathlib.Path(__file__).parents[2] / "alembic" / "versions" / f"{name}.py"
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+class TestTryoutDedup:
+    def test_content_hash_ignores_whitespace_and_case(self):
+        assert content_hash("  Luas   Segitiga\n") == content_hash("luas segitiga")
+        assert content_hash("luas segitiga") != content_hash("luas persegi")
+
+    def test_migration_backfill_matches_content_hash(self, db_session, make_tryout_params):
+        migration = load_migration("6b815065e64a_add_content_hashes")
+        params = make_tryout_params(modules=1, questions=3, options=1)
+        # non-breaking and em spaces, a dotted capital I and a sharp s
+        contents = ["Luas\u00a0Segitiga", "\u2003İstanbul  Soal\n", "STRASSE ß\x1c"]
+        for question, content in zip(params.modules[0].questions, contents):
+            question.content = content
+        tryout = create_tryout(db_session, params)
+        db_session.query(Question).update({Question.content_hash: None})
+
+        migration.backfill_content_hashes(db_session.connection(), "question", batch_size=2)
+        db_session.commit()
+
+        db_session.expire_all()
+        questions = db_session.get(Tryout, tryout.id).modules[0].questions
+        assert [q.content_hash for q in questions] == [content_hash(content) for content in contents]
+
+    def test_successful_create_tryout_stores_hashes(self, db_session, make_tryout_params):
+        tryout = create_tryout(db_session, make_tryout_params(modules=1, questions=1, options=1))
+
+        question = tryout.modules[0].questions[0]
+        assert question.content_hash == content_hash("question 0.0")
+        assert question.options[0].content_hash == content_hash("option 0.0.0")
+        assert existing_hashes(db_session, Question, [content_hash("question 0.0"), content_hash("missing")]) == {content_hash("question 0.0")}
+
+    def test_successful_update_tryout_rehashes_content(self, db_session, make_tryout_params):
+        params = make_tryout_params(modules=1, questions=1, options=1)
+        tryout = create_tryout(db_session, params)
+
+        params.modules[0].questions[0].content = "edited question"
+        update_tryout(db_session, tryout.id, params)
+
+        db_session.expire_all()
+        assert db_session.get(Tryout, tryout.id).modules[0].questions[0].content_hash == content_hash("edited question")
+
+    def test_successful_duplicate_report(self, db_session, make_tryout_params):
+        create_tryout(db_session, make_tryout_params(title="first", modules=1, questions=2))
+        create_tryout(db_session, make_tryout_params(title="second", modules=1, questions=1))
+
+        report = duplicate_report(db_session)
+
+        assert report == [{"content_hash": content_hash("question 0.0"), "count": 2, "tryouts": 2, "sample": "question 0.0"}]
+
+    def test_successful_merge_duplicates(self, db_session, make_tryout_params):
+        params = make_tryout_params(modules=1, questions=3, options=2)
+        params.modules[0].questions[2].content = "Question  0.0"
+        for option in params.modules[0].questions[2].options:
+            option.content = option.content.replace("0.2.", "0.0.")
+        params.modules[0].questions[1].options[1].content = "option 0.1.0"
+        params.modules[0].questions[1].options[1].is_true = True
+        tryout = create_tryout(db_session, params)
+        updated_at = tryout.updated_at
+
+        merged = merge_duplicates(db_session, tryout.id)
+        db_session.commit()
+
+        assert (merged["questions"], merged["options"]) == (1, 1)
+        db_session.expire_all()
+        merged_tryout = db_session.get(Tryout, tryout.id)
+        assert merged_tryout.updated_at > updated_at
+        assert [q.question_order for q in merged_tryout.modules[0].questions] == [0, 1]
+        assert [o.option_order for o in merged_tryout.modules[0].questions[1].options] == [0]
+        assert merge_duplicates(db_session, tryout.id)["questions"] == 0
+
+    def test_merge_duplicates_keeps_questions_with_different_options(self, db_session, make_tryout_params):
+        params = make_tryout_params(modules=1, questions=3, options=2)
+        params.modules[0].questions[1].content = "Question  0.0"
+        params.modules[0].questions[2].content = "question 0.0"
+        for question in params.modules[0].questions[1:]:
+            for option in question.options:
+                option.content = option.content.replace(f"0.{question.question_order}.", "0.0.")
+        # same option contents, but a different correct answer
+        params.modules[0].questions[2].options[0].is_true = False
+        params.modules[0].questions[2].options[1].is_true = True
+        tryout = create_tryout(db_session, params)
+
+        merged = merge_duplicates(db_session, tryout.id)
+        db_session.commit()
+
+        assert (merged["questions"], merged["options"]) == (1, 0)
+        db_session.expire_all()
+        questions = db_session.get(Tryout, tryout.id).modules[0].questions
+        assert [q.question_order for q in questions] == [0, 2]
@@ -0,0 +1,82 @@
+from tryout.leaderboard import Leaderboard, LeaderboardRegistry
+
+def test_leaderboard_top_and_rank():
+    board = Leaderboard()
+    board.update("a", "user_a", 10)
+    board.update("b", "user_b", 30)
+    board.update("c", "user_c", 20)
+
+    assert [entry["tryout_instance_id"] for entry in board.top(2)] == ["b", "c"]
+    assert board.rank("a")["rank"] == 3
+    assert board.rank("b")["percentile"] == 100.0
+    assert board.rank("missing") == None
+
+def test_leaderboard_ties_share_rank():
+    board = Leaderboard()
+    board.update("a", "user_a", 20)
+    board.update("b", "user_b", 20)
+    board.update("c", "user_c", 10)
+
+    assert board.rank("a")["rank"] == 1
+    assert board.rank("b")["rank"] == 1
+    assert board.rank("c")["rank"] == 3
+
+def test_leaderboard_rescore_moves_entry():
+    board = Leaderboard()
+    board.update("a", "user_a", 10)
+    board.update("b", "user_b", 20)
+    board.update("a", "user_a", 30)
+
+    assert len(board) == 2
+    assert board.rank("a")["rank"] == 1
+    assert board.rank("b")["rank"] == 2
+
+def test_registry_updates_only_loaded_boards():
+    registry = LeaderboardRegistry(max_age=60)
+    registry.update("tryout", [("a", "user_a", 10)])
+    assert registry.get("tryout") == None
+
+    registry.load("tryout", [("a", "user_a", 10)])
+    registry.update("tryout", [("b", "user_b", 20)])
+    assert registry.get("tryout").rank("b")["rank"] == 1
+
+    registry.discard("tryout")
+    assert registry.get("tryout") == None
+
+def test_registry_keeps_boards_until_discarded():
+    registry = LeaderboardRegistry(max_age=0)
+    board = registry.load("tryout", [("a", "user_a", 10)], version=(1, None))
+
+    assert registry.get("tryout") is board
+    assert registry.needs_check(board)
+    registry.max_age = 60
+    registry.mark_checked(board)
+    assert not registry.needs_check(board)
+    assert registry.loads == 1
+
+def test_leaderboard_grows_past_initial_scores():
+    board = Leaderboard()
+    board.update("a", "user_a", 3)
+    board.update("b", "user_b", 500)
+    board.update("c", "user_c", 3)
+    board.update("a", "user_a", 1000)
+
+    assert [entry["tryout_instance_id"] for entry in board.top(3)] == ["a", "b", "c"]
+    assert board.rank("c")["rank"] == 3
+    assert board.rank_of_score(501) == 2
+
+def test_leaderboard_rank_matches_sort():
+    import random
+
+    rng = random.Random(7)
+    board = Leaderboard()
+    scores = {}
+    for _ in range(2000):
+        tryout_instance_id = rng.randrange(300)
+        scores[tryout_instance_id] = rng.randrange(40)
+        board.update(tryout_instance_id, None, scores[tryout_instance_id])
+
+    ordered = sorted(scores, key=lambda key: (-scores[key], key))
+    assert [entry["tryout_instance_id"] for entry in board.top(25)] == ordered[:25]
+    for tryout_instance_id, score in scores.items():
+        assert board.rank(tryout_instance_id)["rank"] == 1 + sum(other > score for other in scores.values())
@@ -0,0 +1,223 @@
+from tryout.crud import *
+from tryout.models import Answer, ModuleInstance, Tryout, TryoutInstance
+from tryout.autosave import AnswerBuffer
+from auth.models import User
+
+import uuid
+
+class TestTryoutRouter:
+    def test_successful_get_tryout_snapshot(self, client, db_session, make_tryout_params):
+        tryout = create_tryout(db_session, make_tryout_params())
+
+        response = client.get(f"api/tryout/{tryout.id}")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        assert response.json()["id"] == str(tryout.id)
+        assert len(response.json()["modules"]) == 2
+        assert response.headers["etag"].startswith('"')
+
+    def test_successful_get_tryout_not_modified(self, client, db_session, make_tryout_params):
+        tryout = create_tryout(db_session, make_tryout_params())
+        etag = client.get(f"api/tryout/{tryout.id}").headers["etag"]
+
+        response = client.get(f"api/tryout/{tryout.id}", headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+        assert response.content == b""
+
+    def test_fail_get_tryout_not_found(self, client, db_session):
+        response = client.get(f"api/tryout/{uuid.uuid4()}")
+
+        assert response.status_code == 404
+
+    def test_fail_get_tryout_invalid_id(self, client, db_session):
+        response = client.get("api/tryout/not-a-uuid")
+
+        assert response.status_code == 400
+
+    def test_fail_submit_answers_question_from_other_module(self, client, db_session, make_tryout_params, make_tryout_instance, login_as):
+        tryout = create_tryout(db_session, make_tryout_params())
+        tryout_instance = make_tryout_instance(tryout)
+        module, other_module = tryout.modules
+        module_instance = db_session.query(ModuleInstance).filter(
+            ModuleInstance.tryout_instance_id == tryout_instance.id,
+            ModuleInstance.module_id == module.id
+        ).first()
+        question = other_module.questions[0]
+
+        response = login_as("User", tryout_instance.user_id).post(
+            f"api/tryout/module_instance/{module_instance.id}/answers",
+            json={"answers": [{"question_id": str(question.id), "option_id": str(question.options[0].id)}]}
+        )
+
+        assert response.status_code == 400
+        assert response.json()["detail"] == "question does not belong to module"
+        assert db_session.query(Answer).filter(Answer.module_instance_id == module_instance.id).count() == 0
+
+    def test_fail_submit_answers_other_users_module_instance(self, client, db_session, make_tryout_params, make_tryout_instance, login_as):
+        tryout = create_tryout(db_session, make_tryout_params())
+        tryout_instance = make_tryout_instance(tryout)
+        module = tryout.modules[0]
+        module_instance = db_session.query(ModuleInstance).filter(ModuleInstance.tryout_instance_id == tryout_instance.id).first()
+        question = module.questions[0]
+
+        response = login_as("User").post(
+            f"api/tryout/module_instance/{module_instance.id}/answers",
+            json={"answers": [{"question_id": str(question.id), "option_id": str(question.options[0].id)}]}
+        )
+
+        assert response.status_code == 403
+        assert db_session.query(Answer).filter(Answer.module_instance_id == module_instance.id).count() == 0
+
+    def test_fail_submit_answers_no_token(self, client, db_session, make_tryout_params, make_tryout_instance):
+        tryout = create_tryout(db_session, make_tryout_params())
+        tryout_instance = make_tryout_instance(tryout)
+        module_instance = db_session.query(ModuleInstance).filter(ModuleInstance.tryout_instance_id == tryout_instance.id).first()
+        question = tryout.modules[0].questions[0]
+
+        response = client.post(
+            f"api/tryout/module_instance/{module_instance.id}/answers",
+            json={"answers": [{"question_id": str(question.id), "option_id": str(question.options[0].id)}]}
+        )
+
+        assert response.status_code == 401
+
+    def test_successful_autosave_answer(self, client, db_session, make_tryout_params, make_tryout_instance, login_as, monkeypatch):
+        buffer = AnswerBuffer(lambda rows: len(rows))
+        monkeypatch.setattr("tryout.crud.answer_buffer", buffer)
+        tryout = create_tryout(db_session, make_tryout_params())
+        tryout_instance = make_tryout_instance(tryout)
+        module = tryout.modules[0]
+        module_instance = db_session.query(ModuleInstance).filter(
+            ModuleInstance.tryout_instance_id == tryout_instance.id,
+            ModuleInstance.module_id == module.id
+        ).first()
+        question = module.questions[0]
+
+        response = login_as("User", tryout_instance.user_id).post(
+            f"api/tryout/module_instance/{module_instance.id}/autosave",
+            json={"question_id": str(question.id), "option_id": str(question.options[0].id)}
+        )
+
+        assert response.status_code == 202
+        assert buffer.stats()["pending"] == 1
+
+    def test_fail_autosave_answer_unauthorized(self, client, db_session, make_tryout_params, make_tryout_instance, login_as, monkeypatch):
+        buffer = AnswerBuffer(lambda rows: len(rows))
+        monkeypatch.setattr("tryout.crud.answer_buffer", buffer)
+        tryout = create_tryout(db_session, make_tryout_params())
+        tryout_instance = make_tryout_instance(tryout)
+        module_instance = db_session.query(ModuleInstance).filter(ModuleInstance.tryout_instance_id == tryout_instance.id).first()
+        question = tryout.modules[0].questions[0]
+        answer = {"question_id": str(question.id), "option_id": str(question.options[0].id)}
+
+        assert client.post(f"api/tryout/module_instance/{module_instance.id}/autosave", json=answer).status_code == 401
+        response = login_as("User").post(f"api/tryout/module_instance/{module_instance.id}/autosave", json=answer)
+
+        assert response.status_code == 403
+        assert buffer.stats()["pending"] == 0
+
+    def test_successful_update_tryout(self, client, db_session, make_tryout_params, login_as):
+        tryout = create_tryout(db_session, make_tryout_params())
+        params = make_tryout_params(title="renamed")
+
+        response = login_as("Admin").patch(f"api/tryout/{tryout.id}", json=params.model_dump(mode="json"))
+
+        assert response.status_code == 200
+        db_session.expire_all()
+        assert db_session.get(Tryout, tryout.id).title == "renamed"
+
+    def test_fail_update_tryout_unauthorized(self, client, db_session, make_tryout_params, login_as):
+        tryout = create_tryout(db_session, make_tryout_params())
+        params = make_tryout_params(title="renamed")
+
+        assert client.patch(f"api/tryout/{tryout.id}", json=params.model_dump(mode="json")).status_code == 401
+        response = login_as("User").patch(f"api/tryout/{tryout.id}", json=params.model_dump(mode="json"))
+
+        assert response.status_code == 403
+        db_session.expire_all()
+        assert db_session.get(Tryout, tryout.id).title == "test_tryout"
+
+    def test_successful_delete_tryout(self, client, db_session, make_tryout_params, make_admin, login_as):
+        tryout = create_tryout(db_session, make_tryout_params())
+        admin = make_admin()
+
+        response = login_as("Admin", admin.id).delete(f"api/tryout/{tryout.id}")
+
+        assert response.status_code == 200
+        db_session.expire_all()
+        assert db_session.get(Tryout, tryout.id) is None
+
+    def test_fail_delete_tryout_unauthorized(self, client, db_session, make_tryout_params, login_as):
+        tryout = create_tryout(db_session, make_tryout_params())
+
+        assert client.delete(f"api/tryout/{tryout.id}").status_code == 401
+        assert login_as("User").delete(f"api/tryout/{tryout.id}").status_code == 403
+        db_session.expire_all()
+        assert db_session.get(Tryout, tryout.id) is not None
+
+    def test_fail_delete_tryout_by_demoted_admin(self, client, db_session, make_tryout_params, make_admin, login_as):
+        tryout = create_tryout(db_session, make_tryout_params())
+        admin = make_admin()
+        admin.role_id = None
+        db_session.commit()
+
+        response = login_as("Admin", admin.id).delete(f"api/tryout/{tryout.id}")
+
+        assert response.status_code == 403
+        assert response.json()["detail"] == "unauthorized"
+        db_session.expire_all()
+        assert db_session.get(Tryout, tryout.id) is not None
+
+    def test_successful_clone_tryout(self, client, db_session, make_tryout_params, login_as):
+        tryout = create_tryout(db_session, make_tryout_params())
+
+        response = login_as("Admin").post(f"api/tryout/{tryout.id}/clone", json={"title": "copy"})
+
+        assert response.status_code == 200
+        assert db_session.query(Tryout).filter(Tryout.title == "copy").count() == 1
+
+    def test_fail_clone_tryout_unauthorized(self, client, db_session, make_tryout_params, login_as):
+        tryout = create_tryout(db_session, make_tryout_params())
+
+        assert client.post(f"api/tryout/{tryout.id}/clone", json={"title": "copy"}).status_code == 401
+        assert login_as("User").post(f"api/tryout/{tryout.id}/clone", json={"title": "copy"}).status_code == 403
+        assert db_session.query(Tryout).count() == 1
+
+    def test_successful_grade_tryout(self, client, db_session, make_tryout_params, make_tryout_instance, login_as):
+        tryout = create_tryout(db_session, make_tryout_params())
+        make_tryout_instance(tryout)
+
+        response = login_as("Admin").post(f"api/tryout/{tryout.id}/grade")
+
+        assert response.status_code == 200
+        assert response.json()["graded"] == 1
+
+    def test_fail_grade_tryout_unauthorized(self, client, db_session, make_tryout_params, make_tryout_instance, login_as):
+        tryout = create_tryout(db_session, make_tryout_params())
+        make_tryout_instance(tryout)
+
+        assert client.post(f"api/tryout/{tryout.id}/grade").status_code == 401
+        assert login_as("User").post(f"api/tryout/{tryout.id}/grade").status_code == 403
+
+    def test_successful_start_session_for_token_user(self, client, db_session, make_tryout_params, login_as):
+        tryout = create_tryout(db_session, make_tryout_params())
+        user = User(name="candidate", email="candidate@gmail.com")
+        db_session.add(user)
+        db_session.commit()
+
+        response = login_as("User", user.id).post(f"api/tryout/{tryout.id}/start")
+
+        assert response.status_code == 200
+        assert len(response.json()["module_instances"]) == 2
+        tryout_instance = db_session.get(TryoutInstance, uuid.UUID(response.json()["tryout_instance_id"]))
+        assert tryout_instance.user_id == user.id
+
+    def test_fail_start_session_no_token(self, client, db_session, make_tryout_params):
+        tryout = create_tryout(db_session, make_tryout_params())
+
+        response = client.post(f"api/tryout/{tryout.id}/start", json={"user_id": str(uuid.uuid4())})
+
+        assert response.status_code == 401
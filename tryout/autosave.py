@@ -0,0 +1,127 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class AnswerBuffer:
+    """
+    Write-behind buffer for autosaved answers. Only the latest option per
+    (module_instance_id, question_id) is kept; pending answers are handed to
+    `writer` in one batch when `max_pending` keys accumulate or every
+    `flush_interval` seconds, whichever comes first. An answer whose batch
+    fails is retried with the next flush, at most `max_retries` times,
+    then dropped.
+    """
+
+    def __init__(self, writer, max_pending: int = 1000, flush_interval: float = 1.0, max_retries: int = 3):
+        self.writer = writer
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.received = 0
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self._pending = {}
+        self._retries = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def put(self, module_instance_id, question_id, option_id):
+        with self._lock:
+            self._pending[(module_instance_id, question_id)] = option_id
+            self._retries.pop((module_instance_id, question_id), None)
+            self.received += 1
+            full = len(self._pending) >= self.max_pending
+        if full:
+            self._wake.set()
+
+    def flush(self, module_instance_id=None):
+        """
+        Synchronously write pending answers, either all of them or only
+        those of one module instance. Returns how many rows were written.
+        """
+        with self._flush_lock:
+            with self._lock:
+                if module_instance_id is None:
+                    batch, self._pending = self._pending, {}
+                else:
+                    batch = {key: value for key, value in self._pending.items() if key[0] == module_instance_id}
+                    for key in batch:
+                        del self._pending[key]
+            if not batch:
+                return 0
+
+            rows = [(key[0], key[1], option_id) for key, option_id in batch.items()]
+            try:
+                written = self.writer(rows)
+            except Exception:
+                with self._lock:
+                    dropped = 0
+                    for key, option_id in batch.items():
+                        # answers saved while the write was in flight are newer
+                        if key in self._pending:
+                            continue
+                        retries = self._retries.get(key, 0) + 1
+                        if retries > self.max_retries:
+                            self._retries.pop(key, None)
+                            dropped += 1
+                            continue
+                        self._retries[key] = retries
+                        self._pending[key] = option_id
+                    self.dropped += dropped
+                    self.failed_flushes += 1
+                if dropped:
+                    logger.error("dropped %d autosaved answers after %d failed writes", dropped, self.max_retries + 1)
+                raise
+
+            with self._lock:
+                for key in batch:
+                    self._retries.pop(key, None)
+                self.flushes += 1
+                self.written += written
+            if written != len(rows):
+                logger.warning("dropped %d autosaved answers with unknown module instance or option", len(rows) - written)
+            return written
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="answer-buffer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stopping.set()
+            self._wake.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("failed to flush autosaved answers")
+                time.sleep(self.flush_interval)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "received": self.received,
+                "written": self.written,
+                "dropped": self.dropped,
+                "flushes": self.flushes,
+                "failed_flushes": self.failed_flushes,
+                "coalescing_ratio": self.received / self.written if self.written else 0.0
+            }
@@ -0,0 +1,139 @@
+from collections import OrderedDict
+
+import datetime
+import os
+import threading
+import time
+
+class VersionedCache:
+    """
+    Bounded LRU cache whose entries are only served while the caller-supplied
+    version (the owning tryout's updated_at) still matches and the TTL has not
+    run out. Every entry carries the id of the tryout it belongs to so all of
+    a tryout's entries can be dropped at once.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            entry_version, expires_at, _, value = entry
+            if entry_version != version or expires_at <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, version, tryout_id, value):
+        with self._lock:
+            self._entries[key] = (version, time.monotonic() + self.ttl, tryout_id, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_tryout(self, tryout_id):
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if entry[2] == tryout_id]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+class BoundaryCache:
+    """
+    Small cache whose entries expire at a caller-supplied point in time (the
+    next tryout start or end), capped at `max_age` seconds so writes from
+    other worker processes are picked up eventually. Keys come from request
+    parameters, so at most `maxsize` entries are kept, least recently used
+    dropped first.
+    """
+
+    def __init__(self, max_age: float = 60.0, maxsize: int = 32):
+        self.max_age = max_age
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, now: datetime.datetime):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, expires_at: datetime.datetime | None, now: datetime.datetime):
+        latest = now + datetime.timedelta(seconds=self.max_age)
+        expires_at = min(expires_at, latest) if expires_at else latest
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+
+content_cache = VersionedCache(
+    maxsize=int(os.environ.get("TRYOUT_CACHE_SIZE", 256)),
+    ttl=float(os.environ.get("TRYOUT_CACHE_TTL", 300))
+)
+
+active_cache = BoundaryCache(
+    max_age=float(os.environ.get("ACTIVE_TRYOUTS_CACHE_MAX_AGE", 60)),
+    maxsize=int(os.environ.get("ACTIVE_TRYOUTS_CACHE_SIZE", 32))
+)
+
+# module instance id -> owning user id; an instance never changes hands
+owner_cache = VersionedCache(
+    maxsize=int(os.environ.get("MODULE_INSTANCE_OWNER_CACHE_SIZE", 10000)),
+    ttl=float(os.environ.get("MODULE_INSTANCE_OWNER_CACHE_TTL", 3600))
+)
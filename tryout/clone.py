@@ -0,0 +1,76 @@
+from sqlalchemy import bindparam, text, DateTime, String
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Session
+
+import uuid
+
+CLONE_TRYOUT = text("""
+    WITH new_tryout AS (
+        INSERT INTO tryout (id, title, price, status, started_at, ended_at)
+        SELECT :new_tryout_id,
+               COALESCE(:title, title),
+               price,
+               COALESCE(:status, status),
+               COALESCE(:started_at, started_at),
+               COALESCE(:ended_at, ended_at)
+        FROM tryout
+        WHERE id = :tryout_id
+        RETURNING id
+    ),
+    module_map AS (
+        SELECT module.id AS old_id, gen_random_uuid() AS new_id
+        FROM module JOIN new_tryout ON true
+        WHERE module.tryout_id = :tryout_id
+    ),
+    new_modules AS (
+        INSERT INTO module (id, title, tryout_id, module_order)
+        SELECT module_map.new_id, module.title, :new_tryout_id, module.module_order
+        FROM module JOIN module_map ON module_map.old_id = module.id
+        RETURNING id
+    ),
+    question_map AS (
+        SELECT question.id AS old_id, gen_random_uuid() AS new_id, module_map.new_id AS module_id
+        FROM question JOIN module_map ON module_map.old_id = question.module_id
+    ),
+    new_questions AS (
+        INSERT INTO question (id, content, content_hash, module_id, question_order)
+        SELECT question_map.new_id, question.content, question.content_hash, question_map.module_id, question.question_order
+        FROM question JOIN question_map ON question_map.old_id = question.id
+        RETURNING id
+    ),
+    new_options AS (
+        INSERT INTO option (id, content, content_hash, question_id, is_true, option_order)
+        SELECT gen_random_uuid(), option.content, option.content_hash, question_map.new_id, option.is_true, option.option_order
+        FROM option JOIN question_map ON question_map.old_id = option.question_id
+        RETURNING id
+    )
+    SELECT new_tryout.id AS tryout_id,
+           (SELECT count(*) FROM new_modules) AS modules,
+           (SELECT count(*) FROM new_questions) AS questions,
+           (SELECT count(*) FROM new_options) AS options
+    FROM new_tryout
+""").bindparams(
+    bindparam("new_tryout_id", type_=UUID(as_uuid=True)),
+    bindparam("tryout_id", type_=UUID(as_uuid=True)),
+    bindparam("title", type_=String),
+    bindparam("status", type_=String),
+    bindparam("started_at", type_=DateTime(timezone=True)),
+    bindparam("ended_at", type_=DateTime(timezone=True))
+).columns(tryout_id=UUID(as_uuid=True))
+
+def clone_tryout(db: Session, tryout_id: uuid.UUID, title=None, status=None, started_at=None, ended_at=None):
+    """
+    Copy a tryout with all of its modules, questions and options inside
+    Postgres in one statement. Every copied row gets a fresh UUID and the
+    old-to-new mapping is carried through the module_map and question_map
+    CTEs. Returns (tryout_id, modules, questions, options) or None when the
+    source tryout does not exist. Does not commit.
+    """
+    return db.execute(CLONE_TRYOUT, {
+        "new_tryout_id": uuid.uuid4(),
+        "tryout_id": tryout_id,
+        "title": title,
+        "status": status,
+        "started_at": started_at,
+        "ended_at": ended_at
+    }).first()
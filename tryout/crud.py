@@ -1,68 +1,184 @@
-from sqlalchemy.orm import Session
-from tryout import models, schemas
-from sqlalchemy import desc
+from sqlalchemy.orm import Session, selectinload
+from tryout import models, schemas, ingest, snapshot, scoring, exam_session, autosave, diff, clone
+from tryout.cache import content_cache, active_cache, owner_cache
+from tryout.leaderboard import leaderboards
+from sqlalchemy import desc, func, select, tuple_, values, column, delete, update, literal_column
+from sqlalchemy.dialects.postgresql import UUID, insert
+from sqlalchemy.exc import IntegrityError
 from auth import crud
+from database import SessionLocal
+from pagination import encode_cursor, decode_cursor
 
+import datetime
+import logging
+import os
+import time
 import uuid
 from dateutil import parser
 
+logger = logging.getLogger(__name__)
+
 def create_tryout(db: Session, tryout_params: schemas.CreateTryoutParams):
     try:
-        # Create tryout instance
-        tryout = models.Tryout(
-            title=tryout_params.title,
-            price=tryout_params.price,
-            status=tryout_params.status,
-            started_at=parser.isoparse(tryout_params.startedAt),
-            ended_at=parser.isoparse(tryout_params.endedAt)
-        )
-        db.add(tryout)
+        tryout_id, timings, duplicates = ingest.ingest_tryout(db, tryout_params)
+
+        start = time.perf_counter()
         db.commit()
-        db.refresh(tryout)
-
-        # Create modules
-        for module_params in tryout_params.modules:
-            module = models.Module(
-                title=module_params.title,
-                tryout_id=tryout.id,
-                module_order=module_params.moduleOrder
-            )
-            db.add(module)
-            db.commit()
-            db.refresh(module)
-
-            # Create questions
-            for question_params in module_params.questions:
-                question = models.Question(
-                    content=question_params.content,
-                    module_id=module.id,
-                    question_order=question_params.questionOrder
-                )
-                db.add(question)
-                db.commit()
-                db.refresh(question)
-
-                # Create options
-                for option_params in question_params.options:
-                    option = models.Option(
-                        content=option_params.content,
-                        question_id=question.id,
-                        is_true=option_params.isTrue,
-                        option_order=option_params.optionOrder
-                    )
-                    db.add(option)
-                    db.commit()
-                    db.refresh(option)
-
-        return tryout
+        timings["commit"] = time.perf_counter() - start
+        invalidate_tryout(tryout_id)
+
+        logger.info(
+            "ingested tryout %s: %s; already stored: %d questions, %d options",
+            tryout_id,
+            ", ".join(f"{stage}={elapsed * 1000:.1f}ms" for stage, elapsed in timings.items()),
+            duplicates["questions"],
+            duplicates["options"]
+        )
+        return db.get(models.Tryout, tryout_id)
     except Exception as e:
         db.rollback()
         raise ValueError(crud.handle_exception(e))
 
+def module_tree():
+    return selectinload(models.Module.questions).selectinload(models.Question.options)
+
+def tryout_tree():
+    return selectinload(models.Tryout.modules).options(module_tree())
+
+def invalidate_tryout(tryout_id: uuid.UUID):
+    content_cache.invalidate_tryout(tryout_id)
+    owner_cache.invalidate_tryout(tryout_id)
+    active_cache.clear()
+
 def get_all_tryouts(db: Session):
-    tryouts = db.query(models.Tryout).order_by(desc(models.Tryout.updated_at)).all()
+    tryouts = db.query(models.Tryout).options(tryout_tree()).order_by(desc(models.Tryout.updated_at)).all()
     return [serialize_tryout(tryout) for tryout in tryouts]
 
+def summary_query(db: Session):
+    module_count = (
+        select(func.count(models.Module.id))
+        .where(models.Module.tryout_id == models.Tryout.id)
+        .scalar_subquery()
+    )
+    question_count = (
+        select(func.count(models.Question.id))
+        .join(models.Module, models.Question.module_id == models.Module.id)
+        .where(models.Module.tryout_id == models.Tryout.id)
+        .scalar_subquery()
+    )
+
+    return db.query(
+        models.Tryout.id,
+        models.Tryout.title,
+        models.Tryout.price,
+        models.Tryout.status,
+        models.Tryout.started_at,
+        models.Tryout.ended_at,
+        models.Tryout.updated_at,
+        module_count.label("module_count"),
+        question_count.label("question_count")
+    )
+
+def serialize_summary(row) -> schemas.TryoutSummaryParams:
+    return schemas.TryoutSummaryParams(
+        id=row.id,
+        title=row.title,
+        price=float(row.price),
+        status=row.status,
+        started_at=row.started_at.isoformat(),
+        ended_at=row.ended_at.isoformat(),
+        updated_at=row.updated_at.isoformat(),
+        module_count=row.module_count,
+        question_count=row.question_count
+    )
+
+def get_tryout_summaries(db: Session, limit: int = 20, cursor: str = None, status: str = None, started_after: str = None, ended_before: str = None):
+    query = summary_query(db)
+    try:
+        if status:
+            query = query.filter(models.Tryout.status == status)
+        if started_after:
+            query = query.filter(models.Tryout.started_at >= parser.isoparse(started_after))
+        if ended_before:
+            query = query.filter(models.Tryout.ended_at <= parser.isoparse(ended_before))
+        if cursor:
+            updated_at, tryout_id = decode_cursor(cursor)
+            query = query.filter(tuple_(models.Tryout.updated_at, models.Tryout.id) < (updated_at, tryout_id))
+    except (TypeError, ValueError):
+        raise ValueError("invalid filter or cursor")
+
+    rows = query.order_by(desc(models.Tryout.updated_at), desc(models.Tryout.id)).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].updated_at, rows[-1].id)
+
+    return schemas.TryoutSummaryPage(
+        tryouts=[serialize_summary(row) for row in rows],
+        next_cursor=next_cursor
+    )
+
+def get_active_tryouts(db: Session, status: str = "active"):
+    """
+    Tryouts with the given status whose window contains the current time.
+    The result is cached until the next time a tryout opens or closes, so
+    the front end's polling hits the database once per boundary.
+    """
+    now = datetime.datetime.now(tz=datetime.timezone.utc)
+    cached = active_cache.get(status, now)
+    if cached is not None:
+        return cached
+
+    rows = (
+        summary_query(db)
+        .filter(
+            models.Tryout.status == status,
+            models.Tryout.started_at <= now,
+            models.Tryout.ended_at > now
+        )
+        .order_by(models.Tryout.ended_at)
+        .all()
+    )
+    next_start = (
+        db.query(func.min(models.Tryout.started_at))
+        .filter(models.Tryout.status == status, models.Tryout.started_at > now)
+        .scalar()
+    )
+
+    boundaries = [row.ended_at for row in rows[:1]] + ([next_start] if next_start else [])
+    result = [serialize_summary(row) for row in rows]
+    active_cache.set(status, result, min(boundaries) if boundaries else None, now)
+    return result
+
+def search_questions(db: Session, q: str, limit: int = 20, offset: int = 0):
+    # must match the ix_question_content_fts expression for the GIN index to be used
+    document = func.to_tsvector(literal_column("'simple'::regconfig"), models.Question.content)
+    query = func.websearch_to_tsquery(literal_column("'simple'::regconfig"), q)
+    rank = func.ts_rank(document, query)
+
+    rows = (
+        db.query(
+            models.Question.id,
+            models.Question.content,
+            models.Question.question_order,
+            models.Question.module_id,
+            models.Module.tryout_id,
+            rank.label("rank")
+        )
+        .join(models.Module, models.Question.module_id == models.Module.id)
+        .filter(document.op("@@")(query))
+        .order_by(desc("rank"), models.Question.id)
+        .limit(limit)
+        .offset(offset)
+        .all()
+    )
+    return schemas.QuestionSearchPage(
+        results=[schemas.QuestionSearchResult(**row._asdict()) for row in rows],
+        limit=limit,
+        offset=offset
+    )
+
 def serialize_tryout(tryout: models.Tryout) -> schemas.CreateTryoutParams:
     return schemas.GetTryoutParams(
         id=tryout.id,
@@ -104,10 +220,301 @@ def serialize_option(option: models.Option):
         option_order=option.option_order
     )
 
+def cached_tryout(db: Session, tryout_id: uuid.UUID, kind: str, render):
+    """Load a tryout tree and cache `render(tryout)` under (kind, id) until it is updated."""
+    tryout_id = uuid.UUID(str(tryout_id))
+    version = db.query(models.Tryout.updated_at).filter(models.Tryout.id == tryout_id).scalar()
+    if version is None:
+        return None
+
+    key = (kind, tryout_id)
+    cached = content_cache.get(key, version)
+    if cached is not None:
+        return cached
+
+    tryout = db.query(models.Tryout).options(tryout_tree()).filter(models.Tryout.id == tryout_id).first()
+    if tryout is None:
+        return None
+    result = render(tryout)
+    content_cache.set(key, tryout.updated_at, tryout_id, result)
+    return result
+
 def get_tryout(db: Session, tryout_id: uuid.UUID):
-    tryout = db.query(models.Tryout).filter(models.Tryout.id == tryout_id).first()
-    return serialize_tryout(tryout)
+    return cached_tryout(db, tryout_id, "tryout", serialize_tryout)
+
+def get_tryout_snapshot(db: Session, tryout_id: uuid.UUID):
+    return cached_tryout(db, tryout_id, "tryout_snapshot", lambda tryout: snapshot.render(serialize_tryout(tryout)))
 
 def get_module_by_id(db: Session, id: uuid.UUID):
-    module = db.query(models.Module).filter(models.Module.id == id).first()
-    return serialize_module(module=module)
\ No newline at end of file
+    id = uuid.UUID(str(id))
+    row = (
+        db.query(models.Module.tryout_id, models.Tryout.updated_at)
+        .join(models.Tryout, models.Module.tryout_id == models.Tryout.id)
+        .filter(models.Module.id == id)
+        .first()
+    )
+    if row is None:
+        return None
+
+    key = ("module", id)
+    cached = content_cache.get(key, row.updated_at)
+    if cached is not None:
+        return cached
+
+    module = db.query(models.Module).options(module_tree()).filter(models.Module.id == id).first()
+    if module is None:
+        return None
+    result = serialize_module(module=module)
+    content_cache.set(key, row.updated_at, row.tryout_id, result)
+    return result
+
+def update_tryout(db: Session, tryout_id: uuid.UUID, tryout_params: schemas.CreateTryoutParams):
+    tryout_id = uuid.UUID(str(tryout_id))
+    tryout = db.query(models.Tryout).options(tryout_tree()).filter(models.Tryout.id == tryout_id).first()
+    if tryout is None:
+        raise LookupError("tryout not found")
+
+    plan = diff.diff_tryout(tryout, tryout_params)
+    if not plan.changed:
+        return plan.counts()
+
+    try:
+        for model, ids in plan.deletes.items():
+            if ids:
+                db.execute(delete(model).where(model.id.in_(ids)).execution_options(synchronize_session=False))
+        for model, rows in plan.updates.items():
+            if rows:
+                db.execute(update(model), rows)
+        for model, rows in plan.inserts.items():
+            if rows:
+                db.execute(insert(model), rows)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise ValueError(crud.handle_exception(e))
+
+    invalidate_tryout(tryout_id)
+    return plan.counts()
+
+def clone_tryout(db: Session, tryout_id: uuid.UUID, clone_params: schemas.CloneTryoutParams):
+    tryout_id = uuid.UUID(str(tryout_id))
+    started_at = parser.isoparse(clone_params.started_at) if clone_params.started_at else None
+    ended_at = parser.isoparse(clone_params.ended_at) if clone_params.ended_at else None
+
+    try:
+        result = clone.clone_tryout(db, tryout_id, clone_params.title, clone_params.status, started_at, ended_at)
+    except Exception as e:
+        db.rollback()
+        raise ValueError(crud.handle_exception(e))
+
+    if result is None:
+        db.rollback()
+        raise LookupError("tryout not found")
+    db.commit()
+    invalidate_tryout(result.tryout_id)
+    logger.info(
+        "cloned tryout %s into %s: %d modules, %d questions, %d options",
+        tryout_id, result.tryout_id, result.modules, result.questions, result.options
+    )
+    return db.get(models.Tryout, result.tryout_id)
+
+def delete_tryout(db: Session, tryout_id: uuid.UUID):
+    tryout_id = uuid.UUID(str(tryout_id))
+    affected_rows = db.query(models.Tryout).filter(models.Tryout.id == tryout_id).delete()
+    if affected_rows == 0:
+        raise LookupError("tryout not found")
+    db.commit()
+    invalidate_tryout(tryout_id)
+    leaderboards.discard(tryout_id)
+    return True
+
+def upsert_answers(db: Session, rows):
+    """
+    Write (module_instance_id, question_id, option_id) rows with one
+    INSERT ... SELECT ... ON CONFLICT DO UPDATE. Rows with an unknown module
+    instance, a question from another module, or an option that does not
+    belong to their question are dropped by the joins; returns how many rows
+    were written. Does not commit.
+    """
+    submitted = values(
+        column("module_instance_id", UUID(as_uuid=True)),
+        column("question_id", UUID(as_uuid=True)),
+        column("option_id", UUID(as_uuid=True)),
+        name="submitted"
+    ).data(rows)
+
+    valid_rows = (
+        select(
+            func.gen_random_uuid(),
+            submitted.c.module_instance_id,
+            submitted.c.question_id,
+            submitted.c.option_id
+        )
+        .join(models.ModuleInstance, models.ModuleInstance.id == submitted.c.module_instance_id)
+        .join(
+            models.Question,
+            (models.Question.id == submitted.c.question_id)
+            & (models.Question.module_id == models.ModuleInstance.module_id)
+        )
+        .join(
+            models.Option,
+            (models.Option.id == submitted.c.option_id) & (models.Option.question_id == submitted.c.question_id)
+        )
+    )
+    stmt = insert(models.Answer).from_select(["id", "module_instance_id", "question_id", "option_id"], valid_rows)
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_answer_module_instance_question",
+        set_={"option_id": stmt.excluded.option_id, "updated_at": func.now()}
+    ).returning(models.Answer.id)
+
+    return len(db.execute(stmt).all())
+
+def check_module_instance_owner(db: Session, module_instance_id: uuid.UUID, user_id):
+    """
+    Raise LookupError if the module instance does not exist and
+    PermissionError unless its tryout instance belongs to `user_id`.
+    """
+    owner = owner_cache.get(module_instance_id, None)
+    if owner is None:
+        row = db.execute(
+            select(models.TryoutInstance.user_id, models.TryoutInstance.tryout_id)
+            .join(models.ModuleInstance, models.ModuleInstance.tryout_instance_id == models.TryoutInstance.id)
+            .where(models.ModuleInstance.id == module_instance_id)
+        ).first()
+        if row is None:
+            raise LookupError("module instance not found")
+        owner = row.user_id
+        owner_cache.set(module_instance_id, None, row.tryout_id, owner)
+    if str(owner) != str(user_id):
+        raise PermissionError("module instance belongs to another user")
+
+def submit_answers(db: Session, module_instance_id: uuid.UUID, answers: schemas.SubmitAnswersParams, user_id):
+    module_instance_id = uuid.UUID(str(module_instance_id))
+    check_module_instance_owner(db, module_instance_id, user_id)
+    # pending autosaves must land before the final answers overwrite them
+    answer_buffer.flush(module_instance_id)
+
+    # the last answer for a question wins; ON CONFLICT cannot touch a row twice
+    latest = {answer.question_id: answer.option_id for answer in answers.answers}
+    if not latest:
+        return 0
+    rows = [(module_instance_id, question_id, option_id) for question_id, option_id in latest.items()]
+
+    try:
+        written = upsert_answers(db, rows)
+    except IntegrityError as e:
+        db.rollback()
+        raise ValueError(crud.handle_exception(e))
+
+    if written != len(rows):
+        db.rollback()
+        module_instance = db.get(models.ModuleInstance, module_instance_id)
+        if module_instance is None:
+            raise LookupError("module instance not found")
+        module_questions = db.scalars(
+            select(models.Question.id).where(
+                models.Question.id.in_(latest),
+                models.Question.module_id == module_instance.module_id
+            )
+        ).all()
+        if len(module_questions) != len(latest):
+            raise ValueError("question does not belong to module")
+        raise ValueError("option does not belong to question")
+    db.commit()
+    return written
+
+def write_buffered_answers(rows):
+    db = SessionLocal()
+    try:
+        written = upsert_answers(db, rows)
+        db.commit()
+        return written
+    finally:
+        db.close()
+
+answer_buffer = autosave.AnswerBuffer(
+    write_buffered_answers,
+    max_pending=int(os.environ.get("ANSWER_BUFFER_SIZE", 1000)),
+    flush_interval=float(os.environ.get("ANSWER_BUFFER_INTERVAL", 1.0)),
+    max_retries=int(os.environ.get("ANSWER_BUFFER_RETRIES", 3))
+)
+
+def autosave_answer(db: Session, module_instance_id: uuid.UUID, answer: schemas.AnswerParams, user_id):
+    module_instance_id = uuid.UUID(str(module_instance_id))
+    # the background writer has no caller identity, so ownership is checked here
+    check_module_instance_owner(db, module_instance_id, user_id)
+    answer_buffer.put(module_instance_id, answer.question_id, answer.option_id)
+
+def grade_tryout(db: Session, tryout_id: uuid.UUID):
+    tryout_id = uuid.UUID(str(tryout_id))
+    answer_buffer.flush()
+    results = scoring.grade_tryout(db, tryout_id)
+    db.commit()
+    leaderboards.update(tryout_id, results)
+    return results
+
+def get_leaderboard_board(db: Session, tryout_id: uuid.UUID):
+    """
+    The tryout's leaderboard, loaded on first use. A loaded board is checked
+    against the count and latest update of graded instances every
+    `leaderboards.max_age` seconds and only reloaded when they moved.
+    """
+    graded = (models.TryoutInstance.tryout_id == tryout_id, models.TryoutInstance.score.isnot(None))
+    board = leaderboards.get(tryout_id)
+    if board is not None and leaderboards.needs_check(board):
+        version = tuple(db.execute(
+            select(func.count(), func.max(models.TryoutInstance.updated_at)).where(*graded)
+        ).one())
+        if version == board.version:
+            leaderboards.mark_checked(board)
+        else:
+            board = None
+    if board is None:
+        rows = db.execute(
+            select(
+                models.TryoutInstance.id,
+                models.TryoutInstance.user_id,
+                models.TryoutInstance.score,
+                models.TryoutInstance.updated_at
+            ).where(*graded)
+        ).all()
+        version = (len(rows), max((row.updated_at for row in rows), default=None))
+        board = leaderboards.load(tryout_id, [row[:3] for row in rows], version)
+    return board
+
+def get_leaderboard(db: Session, tryout_id: uuid.UUID, limit: int = 10):
+    board = get_leaderboard_board(db, uuid.UUID(str(tryout_id)))
+    return schemas.LeaderboardParams(
+        total=len(board),
+        entries=[schemas.LeaderboardEntryParams(**entry) for entry in board.top(limit)]
+    )
+
+def get_leaderboard_rank(db: Session, tryout_id: uuid.UUID, tryout_instance_id: uuid.UUID):
+    board = get_leaderboard_board(db, uuid.UUID(str(tryout_id)))
+    entry = board.rank(uuid.UUID(str(tryout_instance_id)))
+    if entry is None:
+        return None
+    return schemas.LeaderboardEntryParams(**entry)
+
+def start_session(db: Session, tryout_id: uuid.UUID, user_id: uuid.UUID):
+    tryout_id = uuid.UUID(str(tryout_id))
+    user_id = uuid.UUID(str(user_id))
+    try:
+        rows = exam_session.start_session(db, tryout_id, user_id)
+    except IntegrityError as e:
+        db.rollback()
+        if "is not present" in str(e.orig):
+            raise LookupError("user not found")
+        raise ValueError(crud.handle_exception(e))
+
+    if not rows:
+        db.rollback()
+        raise LookupError("tryout not found")
+    db.commit()
+    return schemas.StartSessionResponse(
+        tryout_instance_id=rows[0].tryout_instance_id,
+        module_instances=[
+            schemas.ModuleInstanceParams(module_instance_id=row.module_instance_id, module_id=row.module_id)
+            for row in rows if row.module_instance_id is not None
+        ]
+    )
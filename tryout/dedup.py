@@ -0,0 +1,163 @@
+from sqlalchemy import String, cast, delete, exists, func, select, update
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.orm import Session
+from tryout import models
+
+import argparse
+import uuid
+
+def existing_hashes(db: Session, model, hashes):
+    """
+    Return the subset of `hashes` already stored for `model` (Question or
+    Option), using one lookup on the content_hash index.
+    """
+    hashes = set(hashes)
+    if not hashes:
+        return set()
+    return set(db.scalars(select(model.content_hash).where(model.content_hash.in_(hashes)).distinct()))
+
+def duplicate_report(db: Session, limit: int = 50):
+    """
+    Question contents stored more than once, most repeated first. Each entry
+    carries how many rows share the hash, across how many tryouts, and one
+    sample of the content.
+    """
+    rows = db.execute(
+        select(
+            models.Question.content_hash,
+            func.count(models.Question.id).label("count"),
+            func.count(models.Module.tryout_id.distinct()).label("tryouts"),
+            func.min(models.Question.content).label("sample")
+        )
+        .join(models.Module, models.Module.id == models.Question.module_id)
+        .where(models.Question.content_hash.is_not(None))
+        .group_by(models.Question.content_hash)
+        .having(func.count(models.Question.id) > 1)
+        .order_by(func.count(models.Question.id).desc(), models.Question.content_hash)
+        .limit(limit)
+    ).all()
+    return [
+        {"content_hash": row.content_hash, "count": row.count, "tryouts": row.tryouts, "sample": row.sample}
+        for row in rows
+    ]
+
+def merge_duplicates(db: Session, tryout_id: uuid.UUID = None):
+    """
+    Delete repeated questions within a module and repeated options within a
+    question, keeping the one with the lowest order. Questions only count as
+    repeats when their options match too, compared as the set of distinct
+    (content_hash, is_true) pairs. Rows that already have answers are left
+    alone. Touches updated_at of every affected tryout so
+    cached copies are dropped. Does not commit.
+    """
+    tryout_id = uuid.UUID(str(tryout_id)) if tryout_id else None
+
+    # an option without a hash only ever matches itself
+    option_pairs = (
+        select(
+            models.Option.question_id,
+            (
+                func.coalesce(models.Option.content_hash, cast(models.Option.id, String))
+                + ":" + cast(models.Option.is_true, String)
+            ).label("option_key")
+        )
+        .join(models.Question, models.Question.id == models.Option.question_id)
+        .join(models.Module, models.Module.id == models.Question.module_id)
+        .distinct()
+    )
+    if tryout_id is not None:
+        option_pairs = option_pairs.where(models.Module.tryout_id == tryout_id)
+    option_pairs = option_pairs.subquery()
+    option_sets = (
+        select(
+            option_pairs.c.question_id,
+            func.md5(
+                func.string_agg(option_pairs.c.option_key, aggregate_order_by(",", option_pairs.c.option_key))
+            ).label("option_set")
+        )
+        .group_by(option_pairs.c.question_id)
+        .subquery()
+    )
+
+    question_ranks = (
+        select(
+            models.Question.id,
+            models.Module.tryout_id,
+            func.row_number().over(
+                partition_by=(models.Question.module_id, models.Question.content_hash, option_sets.c.option_set),
+                order_by=(models.Question.question_order, models.Question.id)
+            ).label("position")
+        )
+        .join(models.Module, models.Module.id == models.Question.module_id)
+        .outerjoin(option_sets, option_sets.c.question_id == models.Question.id)
+        .where(models.Question.content_hash.is_not(None))
+    )
+    option_ranks = (
+        select(
+            models.Option.id,
+            models.Module.tryout_id,
+            func.row_number().over(
+                partition_by=(models.Option.question_id, models.Option.content_hash, models.Option.is_true),
+                order_by=(models.Option.option_order, models.Option.id)
+            ).label("position")
+        )
+        .join(models.Question, models.Question.id == models.Option.question_id)
+        .join(models.Module, models.Module.id == models.Question.module_id)
+        .where(models.Option.content_hash.is_not(None))
+    )
+    if tryout_id is not None:
+        question_ranks = question_ranks.where(models.Module.tryout_id == tryout_id)
+        option_ranks = option_ranks.where(models.Module.tryout_id == tryout_id)
+    question_ranks = question_ranks.subquery()
+    option_ranks = option_ranks.subquery()
+
+    deleted_questions = db.execute(
+        delete(models.Question)
+        .where(models.Question.id == question_ranks.c.id)
+        .where(question_ranks.c.position > 1)
+        .where(~exists().where(models.Answer.question_id == models.Question.id))
+        .returning(question_ranks.c.tryout_id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    deleted_options = db.execute(
+        delete(models.Option)
+        .where(models.Option.id == option_ranks.c.id)
+        .where(option_ranks.c.position > 1)
+        .where(~exists().where(models.Answer.option_id == models.Option.id))
+        .returning(option_ranks.c.tryout_id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+
+    tryout_ids = set(deleted_questions) | set(deleted_options)
+    if tryout_ids:
+        db.execute(
+            update(models.Tryout)
+            .where(models.Tryout.id.in_(tryout_ids))
+            .values(updated_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+    return {"questions": len(deleted_questions), "options": len(deleted_options), "tryouts": tryout_ids}
+
+def main(argv=None):
+    from database import SessionLocal
+
+    arg_parser = argparse.ArgumentParser(description="Report or merge duplicated question and option content.")
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+    report = commands.add_parser("report")
+    report.add_argument("--limit", type=int, default=50)
+    merge = commands.add_parser("merge")
+    merge.add_argument("--tryout-id", type=uuid.UUID)
+    args = arg_parser.parse_args(argv)
+
+    with SessionLocal() as db:
+        if args.command == "report":
+            for entry in duplicate_report(db, args.limit):
+                print(f"{entry['content_hash']}  {entry['count']:>5} rows  {entry['tryouts']:>4} tryouts  {entry['sample'][:60]!r}")
+            return
+
+        merged = merge_duplicates(db, args.tryout_id)
+        db.commit()
+        print(f"removed {merged['questions']} questions and {merged['options']} options from {len(merged['tryouts'])} tryouts")
+
+if __name__ == "__main__":
+    main()
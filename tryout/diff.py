@@ -0,0 +1,93 @@
+from tryout import models, schemas
+from tryout.ingest import add_module, add_question, add_option
+from tryout.utils import content_hash
+
+import datetime
+from dateutil import parser
+
+class TryoutDiff:
+    """
+    Row-level changes needed to turn a stored tryout tree into a submitted
+    one. Modules, questions and options are matched by their order keys;
+    deleting a module or question takes its children with it through the
+    ON DELETE CASCADE foreign keys.
+    """
+
+    def __init__(self):
+        self.inserts = {models.Module: [], models.Question: [], models.Option: []}
+        self.updates = {models.Tryout: [], models.Module: [], models.Question: [], models.Option: []}
+        self.deletes = {models.Module: [], models.Question: [], models.Option: []}
+
+    @property
+    def changed(self):
+        return any(self.inserts.values()) or any(self.updates.values()) or any(self.deletes.values())
+
+    def counts(self):
+        return {
+            "inserted": sum(len(rows) for rows in self.inserts.values()),
+            "updated": sum(len(rows) for rows in self.updates.values()),
+            "deleted": sum(len(ids) for ids in self.deletes.values())
+        }
+
+def changed_fields(row, values: dict):
+    return {key: value for key, value in values.items() if getattr(row, key) != value}
+
+def diff_tryout(tryout: models.Tryout, tryout_params: schemas.CreateTryoutParams, now: datetime.datetime = None) -> TryoutDiff:
+    now = now or datetime.datetime.now(tz=datetime.timezone.utc)
+    diff = TryoutDiff()
+
+    stored_modules = {module.module_order: module for module in tryout.modules}
+    for module_params in tryout_params.modules:
+        module = stored_modules.pop(module_params.module_order, None)
+        if module is None:
+            add_module(diff.inserts, tryout.id, module_params)
+            continue
+
+        changes = changed_fields(module, {"title": module_params.title})
+        if changes:
+            diff.updates[models.Module].append({"id": module.id, "updated_at": now, **changes})
+        diff_questions(diff, module, module_params, now)
+    diff.deletes[models.Module].extend(module.id for module in stored_modules.values())
+
+    changes = changed_fields(tryout, {
+        "title": tryout_params.title,
+        "status": tryout_params.status,
+        "started_at": parser.isoparse(tryout_params.started_at),
+        "ended_at": parser.isoparse(tryout_params.ended_at)
+    })
+    if float(tryout.price) != tryout_params.price:
+        changes["price"] = tryout_params.price
+    if changes or diff.changed:
+        # the tryout's updated_at versions every cached copy of the tree
+        diff.updates[models.Tryout].append({"id": tryout.id, "updated_at": now, **changes})
+    return diff
+
+def diff_questions(diff: TryoutDiff, module: models.Module, module_params: schemas.CreateModuleParams, now):
+    stored_questions = {question.question_order: question for question in module.questions}
+    for question_params in module_params.questions:
+        question = stored_questions.pop(question_params.question_order, None)
+        if question is None:
+            add_question(diff.inserts, module.id, question_params)
+            continue
+
+        changes = changed_fields(question, {"content": question_params.content})
+        if changes:
+            changes["content_hash"] = content_hash(question_params.content)
+            diff.updates[models.Question].append({"id": question.id, "updated_at": now, **changes})
+        diff_options(diff, question, question_params, now)
+    diff.deletes[models.Question].extend(question.id for question in stored_questions.values())
+
+def diff_options(diff: TryoutDiff, question: models.Question, question_params: schemas.QuestionModuleParams, now):
+    stored_options = {option.option_order: option for option in question.options}
+    for option_params in question_params.options:
+        option = stored_options.pop(option_params.option_order, None)
+        if option is None:
+            add_option(diff.inserts, question.id, option_params)
+            continue
+
+        changes = changed_fields(option, {"content": option_params.content, "is_true": option_params.is_true})
+        if "content" in changes:
+            changes["content_hash"] = content_hash(option_params.content)
+        if changes:
+            diff.updates[models.Option].append({"id": option.id, "updated_at": now, **changes})
+    diff.deletes[models.Option].extend(option.id for option in stored_options.values())
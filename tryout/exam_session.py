@@ -0,0 +1,59 @@
+from sqlalchemy import bindparam, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Session
+
+import uuid
+
+START_SESSION = text("""
+    WITH new_instance AS (
+        INSERT INTO tryoutinstance (id, tryout_id, user_id, status)
+        SELECT :tryout_instance_id, tryout.id, :user_id, :status
+        FROM tryout
+        WHERE tryout.id = :tryout_id
+        ON CONFLICT ON CONSTRAINT uq_tryoutinstance_tryout_user DO NOTHING
+        RETURNING id
+    ),
+    new_modules AS (
+        INSERT INTO moduleinstance (id, module_id, tryout_instance_id)
+        SELECT gen_random_uuid(), module.id, new_instance.id
+        FROM module CROSS JOIN new_instance
+        WHERE module.tryout_id = :tryout_id
+        RETURNING id, module_id, tryout_instance_id
+    )
+    SELECT new_instance.id AS tryout_instance_id, new_modules.id AS module_instance_id, new_modules.module_id
+    FROM new_instance
+    LEFT JOIN new_modules ON new_modules.tryout_instance_id = new_instance.id
+    UNION ALL
+    SELECT tryoutinstance.id, moduleinstance.id, moduleinstance.module_id
+    FROM tryoutinstance
+    LEFT JOIN moduleinstance ON moduleinstance.tryout_instance_id = tryoutinstance.id
+    WHERE tryoutinstance.tryout_id = :tryout_id AND tryoutinstance.user_id = :user_id
+""").bindparams(
+    bindparam("tryout_instance_id", type_=UUID(as_uuid=True)),
+    bindparam("tryout_id", type_=UUID(as_uuid=True)),
+    bindparam("user_id", type_=UUID(as_uuid=True))
+).columns(
+    tryout_instance_id=UUID(as_uuid=True),
+    module_instance_id=UUID(as_uuid=True),
+    module_id=UUID(as_uuid=True)
+)
+
+def start_session(db: Session, tryout_id: uuid.UUID, user_id: uuid.UUID, status: str = "started"):
+    """
+    Create a tryout instance and one module instance per module in a single
+    statement, or return the existing ones when the user already started
+    this tryout. Returns (tryout_instance_id, module_instance_id, module_id)
+    rows; empty when the tryout does not exist. Does not commit.
+    """
+    params = {
+        "tryout_instance_id": uuid.uuid4(),
+        "tryout_id": tryout_id,
+        "user_id": user_id,
+        "status": status
+    }
+    rows = db.execute(START_SESSION, params).all()
+    if not rows:
+        # a concurrent start may have committed after this statement's
+        # snapshot was taken; a fresh statement sees it
+        rows = db.execute(START_SESSION, params).all()
+    return rows
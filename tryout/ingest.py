@@ -0,0 +1,97 @@
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from tryout import models, schemas, dedup
+from tryout.utils import content_hash
+
+import time
+import uuid
+from dateutil import parser
+
+def build_rows(tryout_params: schemas.CreateTryoutParams):
+    """
+    Flatten a tryout tree into one list of row dicts per table.
+    Primary keys are generated here so children can reference their parents
+    without a round trip per row.
+    """
+    tryout_id = uuid.uuid4()
+    tryout_row = {
+        "id": tryout_id,
+        "title": tryout_params.title,
+        "price": tryout_params.price,
+        "status": tryout_params.status,
+        "started_at": parser.isoparse(tryout_params.started_at),
+        "ended_at": parser.isoparse(tryout_params.ended_at)
+    }
+
+    rows = {models.Module: [], models.Question: [], models.Option: []}
+    for module_params in tryout_params.modules:
+        add_module(rows, tryout_id, module_params)
+
+    return tryout_row, rows[models.Module], rows[models.Question], rows[models.Option]
+
+def add_module(rows: dict, tryout_id, module_params: schemas.CreateModuleParams):
+    module_id = uuid.uuid4()
+    rows[models.Module].append({
+        "id": module_id,
+        "title": module_params.title,
+        "tryout_id": tryout_id,
+        "module_order": module_params.module_order
+    })
+    for question_params in module_params.questions:
+        add_question(rows, module_id, question_params)
+
+def add_question(rows: dict, module_id, question_params: schemas.QuestionModuleParams):
+    question_id = uuid.uuid4()
+    rows[models.Question].append({
+        "id": question_id,
+        "content": question_params.content,
+        "content_hash": content_hash(question_params.content),
+        "module_id": module_id,
+        "question_order": question_params.question_order
+    })
+    for option_params in question_params.options:
+        add_option(rows, question_id, option_params)
+
+def add_option(rows: dict, question_id, option_params: schemas.OptionModuleParams):
+    rows[models.Option].append({
+        "id": uuid.uuid4(),
+        "content": option_params.content,
+        "content_hash": content_hash(option_params.content),
+        "question_id": question_id,
+        "is_true": option_params.is_true,
+        "option_order": option_params.option_order
+    })
+
+def ingest_tryout(db: Session, tryout_params: schemas.CreateTryoutParams):
+    """
+    Write a whole tryout tree with one multi-row INSERT per table.
+    Does not commit; the caller owns the transaction.
+    Returns the new tryout id, the elapsed seconds for each stage and how
+    many of the questions and options were already stored elsewhere.
+    """
+    timings = {}
+
+    start = time.perf_counter()
+    tryout_row, module_rows, question_rows, option_rows = build_rows(tryout_params)
+    timings["build"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    duplicates = {}
+    for stage, model, rows in (("questions", models.Question, question_rows), ("options", models.Option, option_rows)):
+        known = dedup.existing_hashes(db, model, (row["content_hash"] for row in rows))
+        duplicates[stage] = sum(row["content_hash"] in known for row in rows)
+    timings["dedup"] = time.perf_counter() - start
+
+    stages = [
+        ("tryout", models.Tryout, [tryout_row]),
+        ("modules", models.Module, module_rows),
+        ("questions", models.Question, question_rows),
+        ("options", models.Option, option_rows),
+    ]
+    for stage, model, rows in stages:
+        start = time.perf_counter()
+        if rows:
+            db.execute(insert(model), rows)
+        timings[stage] = time.perf_counter() - start
+
+    return tryout_row["id"], timings, duplicates
@@ -0,0 +1,164 @@
+from bisect import bisect_left, insort
+
+import os
+import threading
+import time
+
+class Leaderboard:
+    """
+    Graded instances of one tryout bucketed by score. Scores are small
+    non-negative integers (correct answers), so a Fenwick tree indexed by
+    score counts the instances above any score in O(log max_score): a rank
+    is one prefix sum and grading an instance is a bucket move plus two
+    tree updates, however many candidates there are. Top-N walks the
+    distinct scores from the highest.
+    """
+
+    def __init__(self, version=None):
+        self._entries = {}
+        self._buckets = {}
+        self._ordered = {}
+        self._scores = []
+        self._tree = [0] * 65
+        self._lock = threading.Lock()
+        self.version = version
+        self.checked_at = time.monotonic()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def update(self, tryout_instance_id, user_id, score):
+        if score < 0:
+            raise ValueError("leaderboard scores must be non-negative")
+        with self._lock:
+            entry = self._entries.get(tryout_instance_id)
+            if entry is not None:
+                self._remove(tryout_instance_id, entry[1])
+
+            self._add(score, 1)
+            self._entries[tryout_instance_id] = (user_id, score)
+            bucket = self._buckets.get(score)
+            if bucket is None:
+                bucket = self._buckets[score] = set()
+                # one entry per distinct score, bounded by the question count
+                insort(self._scores, score)
+            bucket.add(tryout_instance_id)
+            self._ordered.pop(score, None)
+
+    def _remove(self, tryout_instance_id, score):
+        bucket = self._buckets[score]
+        bucket.discard(tryout_instance_id)
+        if not bucket:
+            del self._buckets[score]
+            del self._scores[bisect_left(self._scores, score)]
+        self._ordered.pop(score, None)
+        self._add(score, -1)
+
+    def _add(self, score, delta):
+        if score + 1 >= len(self._tree):
+            self._grow(score)
+        i = score + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def _grow(self, score):
+        size = len(self._tree)
+        while score + 1 >= size:
+            size *= 2
+        self._tree = [0] * size
+        for bucket_score, bucket in self._buckets.items():
+            i = bucket_score + 1
+            while i < size:
+                self._tree[i] += len(bucket)
+                i += i & -i
+
+    def _count_up_to(self, score):
+        i = min(score + 1, len(self._tree) - 1)
+        total = 0
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def rank_of_score(self, score):
+        # competition ranking: equal scores share a rank, the next rank skips
+        return len(self._entries) - self._count_up_to(score) + 1
+
+    def top(self, limit):
+        with self._lock:
+            result = []
+            for score in reversed(self._scores):
+                ordered = self._ordered.get(score)
+                if ordered is None:
+                    ordered = self._ordered[score] = sorted(self._buckets[score])
+                for tryout_instance_id in ordered[:limit - len(result)]:
+                    result.append(self._entry(tryout_instance_id, score))
+                if len(result) >= limit:
+                    break
+            return result
+
+    def rank(self, tryout_instance_id):
+        with self._lock:
+            entry = self._entries.get(tryout_instance_id)
+            if entry is None:
+                return None
+            return self._entry(tryout_instance_id, entry[1])
+
+    def _entry(self, tryout_instance_id, score):
+        rank = self.rank_of_score(score)
+        total = len(self._entries)
+        return {
+            "rank": rank,
+            "tryout_instance_id": tryout_instance_id,
+            "user_id": self._entries[tryout_instance_id][0],
+            "score": score,
+            "percentile": 100.0 * (total - rank + 1) / total
+        }
+
+class LeaderboardRegistry:
+    """
+    One Leaderboard per tryout, loaded lazily and kept current by the grades
+    applied in this process. Every `max_age` seconds the caller compares the
+    board's version with the database so grades written by other worker
+    processes are picked up; the board is only reloaded when it changed.
+    """
+
+    def __init__(self, max_age: float = 60.0):
+        self.max_age = max_age
+        self.loads = 0
+        self._boards = {}
+        self._lock = threading.Lock()
+
+    def get(self, tryout_id):
+        with self._lock:
+            return self._boards.get(tryout_id)
+
+    def needs_check(self, board):
+        return time.monotonic() - board.checked_at > self.max_age
+
+    def mark_checked(self, board):
+        board.checked_at = time.monotonic()
+
+    def load(self, tryout_id, rows, version=None):
+        board = Leaderboard(version)
+        for tryout_instance_id, user_id, score in rows:
+            board.update(tryout_instance_id, user_id, score)
+        with self._lock:
+            self._boards[tryout_id] = board
+            self.loads += 1
+        return board
+
+    def update(self, tryout_id, rows):
+        with self._lock:
+            board = self._boards.get(tryout_id)
+        if board is None:
+            return
+        for tryout_instance_id, user_id, score in rows:
+            board.update(tryout_instance_id, user_id, score)
+
+    def discard(self, tryout_id):
+        with self._lock:
+            self._boards.pop(tryout_id, None)
+
+leaderboards = LeaderboardRegistry(max_age=float(os.environ.get("LEADERBOARD_MAX_AGE", 60)))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, func, String, Integer, ForeignKey, Text, Boolean, DECIMAL
+from sqlalchemy import Column, DateTime, func, String, Integer, ForeignKey, Text, Boolean, DECIMAL, UniqueConstraint, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship, backref
 import uuid
@@ -7,6 +7,10 @@ from database import Base
 
 class Tryout(Base):
     __tablename__ = "tryout"
+    __table_args__ = (
+        Index("ix_tryout_status_started_at_ended_at", "status", "started_at", "ended_at"),
+        Index("ix_tryout_updated_at_id", "updated_at", "id"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     title = Column(String, nullable=False)
@@ -17,15 +21,19 @@ class Tryout(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
-    modules = relationship("Module", backref="tryout", cascade="all, delete")
+    modules = relationship("Module", backref="tryout", cascade="all, delete", order_by="Module.module_order")
 
 class TryoutInstance(Base):
     __tablename__ = "tryoutinstance"
+    __table_args__ = (
+        UniqueConstraint("tryout_id", "user_id", name="uq_tryoutinstance_tryout_user"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    tryout_id = Column(UUID(as_uuid=True), ForeignKey("tryout.id", ondelete="CASCADE"), nullable=False)
+    tryout_id = Column(UUID(as_uuid=True), ForeignKey("tryout.id", ondelete="CASCADE"), nullable=False, index=True)
     user_id = Column(UUID(as_uuid=True), ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
     status = Column(String, nullable=False)
+    score = Column(Integer)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
@@ -39,34 +47,40 @@ class Module(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
-    questions = relationship("Question", backref="module", cascade="all, delete")
+    questions = relationship("Question", backref="module", cascade="all, delete", order_by="Question.question_order")
 
 class ModuleInstance(Base):
     __tablename__ = "moduleinstance"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     module_id = Column(UUID(as_uuid=True), ForeignKey("module.id", ondelete="CASCADE"), nullable=False)
-    tryout_instance_id = Column(UUID(as_uuid=True), ForeignKey("tryoutinstance.id", ondelete="CASCADE"), nullable=False)
+    tryout_instance_id = Column(UUID(as_uuid=True), ForeignKey("tryoutinstance.id", ondelete="CASCADE"), nullable=False, index=True)
+    score = Column(Integer)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
 class Question(Base):
     __tablename__ = "question"
+    __table_args__ = (
+        Index("ix_question_content_fts", text("to_tsvector('simple'::regconfig, content)"), postgresql_using="gin"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     content = Column(Text, nullable=False)
+    content_hash = Column(String(64), index=True)
     module_id = Column(UUID(as_uuid=True), ForeignKey("module.id", ondelete="CASCADE"), nullable=False)
     question_order = Column(Integer)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
-    options = relationship("Option", backref="question", cascade="all, delete")
+    options = relationship("Option", backref="question", cascade="all, delete", order_by="Option.option_order")
 
 class Option(Base):
     __tablename__ = "option"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     content = Column(Text, nullable=False)
+    content_hash = Column(String(64), index=True)
     question_id = Column(UUID(as_uuid=True), ForeignKey("question.id", ondelete="CASCADE"), nullable=False)
     is_true = Column(Boolean, nullable=False, default=False)
     option_order = Column(Integer)
@@ -75,6 +89,9 @@ class Option(Base):
 
 class Answer(Base):
     __tablename__ = "answer"
+    __table_args__ = (
+        UniqueConstraint("module_instance_id", "question_id", name="uq_answer_module_instance_question"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     question_id = Column(UUID(as_uuid=True), ForeignKey("question.id", ondelete="CASCADE"), nullable=False)
@@ -1,35 +1,168 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Header, Response
 from sqlalchemy.orm import Session
 from database import get_db
-from tryout import schemas, crud
+from auth.dependencies import current_user, require_role
+from tryout import schemas, crud, snapshot
+
+from typing import Annotated, List
 
 router = APIRouter()
 
 @router.post("")
-async def create_tryout(tryout_params: schemas.CreateTryoutParams, db: Session = Depends(get_db)):
+def create_tryout(tryout_params: schemas.CreateTryoutParams, db: Session = Depends(get_db)):
     try:
         return crud.create_tryout(db, tryout_params)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.get("")
-def get_tryouts(db: Session = Depends(get_db)):
+@router.post("/module_instance/{module_instance_id}/answers")
+def submit_answers(
+    module_instance_id: str,
+    answers: schemas.SubmitAnswersParams,
+    token_data: dict = Depends(current_user),
+    db: Session = Depends(get_db)
+):
+    try:
+        count = crud.submit_answers(db, module_instance_id, answers, token_data.get("id"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except PermissionError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"message": "answers submitted successfully", "count": count}
+
+@router.post("/module_instance/{module_instance_id}/autosave", status_code=202)
+def autosave_answer(
+    module_instance_id: str,
+    answer: schemas.AnswerParams,
+    token_data: dict = Depends(current_user),
+    db: Session = Depends(get_db)
+):
     try:
-        tryouts = crud.get_all_tryouts(db)
-        return tryouts
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        crud.autosave_answer(db, module_instance_id, answer, token_data.get("id"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except PermissionError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"message": "answer saved"}
+
+@router.get("", response_model=schemas.TryoutSummaryPage)
+def get_tryouts(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = None,
+    status: str | None = None,
+    started_after: str | None = None,
+    ended_before: str | None = None,
+    db: Session = Depends(get_db)
+):
+    try:
+        return crud.get_tryout_summaries(db, limit, cursor, status, started_after, ended_before)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-@router.get("/{tryout_id}")
-def get_tryout(tryout_id: str, db: Session = Depends(get_db)):
+@router.get("/questions/search", response_model=schemas.QuestionSearchPage)
+def search_questions(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db)
+):
+    return crud.search_questions(db, q, limit, offset)
+
+@router.get("/active", response_model=List[schemas.TryoutSummaryParams])
+def get_active_tryouts(status: str = "active", db: Session = Depends(get_db)):
+    return crud.get_active_tryouts(db, status)
+
+@router.get("/{tryout_id}", response_model=schemas.GetTryoutParams)
+def get_tryout(tryout_id: str, if_none_match: Annotated[str | None, Header()] = None, db: Session = Depends(get_db)):
     try:
-        tryout = crud.get_tryout(db, tryout_id)
+        tryout = crud.get_tryout_snapshot(db, tryout_id)
         if tryout is None:
             raise HTTPException(status_code=404, detail="Tryout not found")
-        return tryout
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+    headers = {"ETag": tryout.etag}
+    if snapshot.etag_matches(if_none_match, tryout.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=tryout.body, media_type="application/json", headers=headers)
+
+@router.patch("/{tryout_id}")
+def update_tryout(
+    tryout_id: str,
+    tryout_params: schemas.CreateTryoutParams,
+    token_data: dict = Depends(require_role("Admin")),
+    db: Session = Depends(get_db)
+):
+    try:
+        changes = crud.update_tryout(db, tryout_id, tryout_params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"message": "tryout updated successfully", **changes}
+
+@router.delete("/{tryout_id}")
+def delete_tryout(tryout_id: str, token_data: dict = Depends(require_role("Admin", verify=True)), db: Session = Depends(get_db)):
+    try:
+        crud.delete_tryout(db, tryout_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"message": "tryout deleted successfully"}
+
+@router.post("/{tryout_id}/clone")
+def clone_tryout(
+    tryout_id: str,
+    clone_params: schemas.CloneTryoutParams,
+    token_data: dict = Depends(require_role("Admin")),
+    db: Session = Depends(get_db)
+):
+    try:
+        return crud.clone_tryout(db, tryout_id, clone_params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@router.post("/{tryout_id}/start", response_model=schemas.StartSessionResponse)
+def start_session(tryout_id: str, token_data: dict = Depends(current_user), db: Session = Depends(get_db)):
+    try:
+        return crud.start_session(db, tryout_id, token_data.get("id"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@router.post("/{tryout_id}/grade")
+def grade_tryout(tryout_id: str, token_data: dict = Depends(require_role("Admin")), db: Session = Depends(get_db)):
+    try:
+        results = crud.grade_tryout(db, tryout_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"message": "tryout graded successfully", "graded": len(results)}
+
+@router.get("/{tryout_id}/leaderboard", response_model=schemas.LeaderboardParams)
+def get_leaderboard(tryout_id: str, limit: int = Query(10, ge=1, le=100), db: Session = Depends(get_db)):
+    try:
+        return crud.get_leaderboard(db, tryout_id, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/{tryout_id}/leaderboard/{tryout_instance_id}", response_model=schemas.LeaderboardEntryParams)
+def get_leaderboard_rank(tryout_id: str, tryout_instance_id: str, db: Session = Depends(get_db)):
+    try:
+        entry = crud.get_leaderboard_rank(db, tryout_id, tryout_instance_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if entry is None:
+        raise HTTPException(status_code=404, detail="tryout instance not graded")
+    return entry
+
 @router.get("/{tryout_id}/{module_id}")
 def get_module(module_id: str, db: Session = Depends(get_db)):
     try:
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 from pydantic import BaseModel
 
 import uuid
@@ -56,3 +56,63 @@ class GetTryoutParams(BaseModel):
 class TryoutResponse(BaseModel):
     tryouts: List[GetTryoutParams]
     message: str
+
+class TryoutSummaryParams(BaseModel):
+    id: uuid.UUID
+    title: str
+    price: float
+    status: str
+    started_at: str
+    ended_at: str
+    updated_at: str
+    module_count: int
+    question_count: int
+
+class TryoutSummaryPage(BaseModel):
+    tryouts: List[TryoutSummaryParams]
+    next_cursor: Optional[str] = None
+
+class AnswerParams(BaseModel):
+    question_id: uuid.UUID
+    option_id: uuid.UUID
+
+class SubmitAnswersParams(BaseModel):
+    answers: List[AnswerParams]
+
+class LeaderboardEntryParams(BaseModel):
+    rank: int
+    tryout_instance_id: uuid.UUID
+    user_id: uuid.UUID
+    score: int
+    percentile: float
+
+class LeaderboardParams(BaseModel):
+    total: int
+    entries: List[LeaderboardEntryParams]
+
+class ModuleInstanceParams(BaseModel):
+    module_instance_id: uuid.UUID
+    module_id: uuid.UUID
+
+class StartSessionResponse(BaseModel):
+    tryout_instance_id: uuid.UUID
+    module_instances: List[ModuleInstanceParams]
+
+class CloneTryoutParams(BaseModel):
+    title: Optional[str] = None
+    status: Optional[str] = None
+    started_at: Optional[str] = None
+    ended_at: Optional[str] = None
+
+class QuestionSearchResult(BaseModel):
+    id: uuid.UUID
+    content: str
+    question_order: int
+    module_id: uuid.UUID
+    tryout_id: uuid.UUID
+    rank: float
+
+class QuestionSearchPage(BaseModel):
+    results: List[QuestionSearchResult]
+    limit: int
+    offset: int
@@ -0,0 +1,56 @@
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+from tryout import models
+
+import uuid
+
+def grade_tryout(db: Session, tryout_id: uuid.UUID):
+    """
+    Score every instance of a tryout with two set-based UPDATEs: one writes
+    the number of correct answers per module instance, the next sums those
+    into each tryout instance. Only answers to questions of the module
+    instance's own module count. Returns (tryout_instance_id, user_id, score)
+    rows for the graded instances. Does not commit.
+    """
+    tryout_id = uuid.UUID(str(tryout_id))
+
+    module_scores = (
+        select(
+            models.ModuleInstance.id.label("module_instance_id"),
+            func.count(models.Option.id).filter(
+                models.Option.is_true & (models.Question.module_id == models.ModuleInstance.module_id)
+            ).label("score")
+        )
+        .join(models.TryoutInstance, models.ModuleInstance.tryout_instance_id == models.TryoutInstance.id)
+        .outerjoin(models.Answer, models.Answer.module_instance_id == models.ModuleInstance.id)
+        .outerjoin(models.Question, models.Question.id == models.Answer.question_id)
+        .outerjoin(models.Option, models.Option.id == models.Answer.option_id)
+        .where(models.TryoutInstance.tryout_id == tryout_id)
+        .group_by(models.ModuleInstance.id)
+        .subquery()
+    )
+    db.execute(
+        update(models.ModuleInstance)
+        .where(models.ModuleInstance.id == module_scores.c.module_instance_id)
+        .values(score=module_scores.c.score, updated_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+
+    tryout_scores = (
+        select(
+            models.ModuleInstance.tryout_instance_id.label("tryout_instance_id"),
+            func.sum(models.ModuleInstance.score).label("score")
+        )
+        .join(models.TryoutInstance, models.ModuleInstance.tryout_instance_id == models.TryoutInstance.id)
+        .where(models.TryoutInstance.tryout_id == tryout_id)
+        .group_by(models.ModuleInstance.tryout_instance_id)
+        .subquery()
+    )
+    result = db.execute(
+        update(models.TryoutInstance)
+        .where(models.TryoutInstance.id == tryout_scores.c.tryout_instance_id)
+        .values(score=tryout_scores.c.score, updated_at=func.now())
+        .returning(models.TryoutInstance.id, models.TryoutInstance.user_id, models.TryoutInstance.score)
+        .execution_options(synchronize_session=False)
+    )
+    return result.all()
@@ -0,0 +1,20 @@
+from typing import NamedTuple
+from pydantic import BaseModel
+
+import hashlib
+import orjson
+
+class Snapshot(NamedTuple):
+    body: bytes
+    etag: str
+
+def render(model: BaseModel) -> Snapshot:
+    body = orjson.dumps(model.model_dump())
+    etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+    return Snapshot(body, etag)
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
@@ -0,0 +1,7 @@
+from hashlib import sha256
+
+def normalize_content(content: str) -> str:
+    return " ".join(content.split()).lower()
+
+def content_hash(content: str) -> str:
+    return sha256(normalize_content(content).encode("utf-8")).hexdigest()